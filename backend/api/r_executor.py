@@ -11,12 +11,35 @@ Author: Backend Team Integration
 
 import subprocess
 import os
+import csv
 import json
-from pathlib import Path
-from typing import Dict, List, Optional
+import threading
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
 from datetime import datetime
 
 
+# Trailing R output kept for error reporting: at most this many lines,
+# and at most this many characters in the returned error message
+OUTPUT_TAIL_LINES = 200
+OUTPUT_TAIL_CHARS = 8192
+
+# Optional analysis parameters and their R script flags, in command order
+_OPTIONAL_R_ARGS = (
+    ('ngene_chr', '--ngene_chr'),
+    ('win_size', '--win_size'),
+    ('n_cores', '--cores'),
+    ('LOW_DR', '--low_dr'),
+    ('UP_DR', '--up_dr'),
+    ('KS_cut', '--ks_cut'),
+    ('distance', '--distance'),
+    ('cell_line', '--cell_line'),
+)
+
+# Project root, resolved once at import (this file lives in backend/api/)
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
 def run_copykat_analysis(params: Dict) -> Dict:
     """
     Execute CopyKAT analysis by calling R script.
@@ -41,6 +64,7 @@ def run_copykat_analysis(params: Dict) -> Dict:
                 - n_cores: CPU cores (default: 4)
                 - cell_line: 'yes' or 'no' (default: 'no')
                 - plot_genes: Show gene names (default: True)
+                - log_file: Path to tee R output into (default: None)
     
     Returns:
         Dictionary with results:
@@ -87,14 +111,31 @@ def run_copykat_analysis(params: Dict) -> Dict:
     try:
         start_time = datetime.now()
         
-        result = subprocess.run(
+        # Stream merged stdout/stderr line by line instead of buffering the
+        # whole R output in memory; only a bounded tail is kept for errors
+        process = subprocess.Popen(
             command,
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=1,
             text=True,
-            check=True,
             cwd=get_project_root()
         )
         
+        reader, output_tail = start_output_reader(process, params.get('log_file'))
+        return_code = process.wait()
+        reader.join()
+        
+        if return_code != 0:
+            return {
+                'success': False,
+                'error': f"R script failed: {''.join(output_tail)[-OUTPUT_TAIL_CHARS:]}",
+                'output_dir': None,
+                'files': {},
+                'summary': {},
+                'runtime_minutes': 0
+            }
+        
         end_time = datetime.now()
         runtime = (end_time - start_time).total_seconds() / 60
         
@@ -124,16 +165,6 @@ def run_copykat_analysis(params: Dict) -> Dict:
                 'runtime_minutes': runtime
             }
     
-    except subprocess.CalledProcessError as e:
-        return {
-            'success': False,
-            'error': f"R script failed: {e.stderr}",
-            'output_dir': None,
-            'files': {},
-            'summary': {},
-            'runtime_minutes': 0
-        }
-    
     except Exception as e:
         return {
             'success': False,
@@ -145,6 +176,60 @@ def run_copykat_analysis(params: Dict) -> Dict:
         }
 
 
+def start_output_reader(
+    process: subprocess.Popen,
+    log_file: Optional[str] = None,
+    max_lines: int = OUTPUT_TAIL_LINES
+) -> Tuple[threading.Thread, Deque[str]]:
+    """
+    Consume process output on a background thread.
+    
+    Each line is appended to a bounded tail buffer (overlong lines keep
+    only their last OUTPUT_TAIL_CHARS characters) and, if given, written
+    to a log file as it arrives. Output is drained to the end even if the
+    log file cannot be opened or written. The buffer can be passed to
+    monitor_analysis_progress for live progress messages.
+    
+    Args:
+        process: Popen object started with stdout=PIPE and text=True
+        log_file: Optional path to tee output into
+        max_lines: Number of trailing lines to keep
+    
+    Returns:
+        Tuple of (reader thread, tail buffer)
+    """
+    tail: Deque[str] = deque(maxlen=max_lines)
+    
+    def _reader() -> None:
+        log = None
+        try:
+            # The pipe must be drained even without a log, or R blocks on
+            # a full pipe and process.wait() never returns
+            if log_file:
+                try:
+                    log = open(log_file, 'a')
+                except OSError as e:
+                    tail.append(f"Could not open log file {log_file}: {e}\n")
+            
+            for line in process.stdout:
+                tail.append(line[-OUTPUT_TAIL_CHARS:])
+                if log:
+                    try:
+                        log.write(line)
+                    except OSError:
+                        log.close()
+                        log = None
+        finally:
+            process.stdout.close()
+            if log:
+                log.close()
+    
+    thread = threading.Thread(target=_reader, daemon=True)
+    thread.start()
+    
+    return thread, tail
+
+
 def build_r_command(script_path: str, params: Dict) -> List[str]:
     """
     Build command line arguments for R script.
@@ -156,38 +241,20 @@ def build_r_command(script_path: str, params: Dict) -> List[str]:
     Returns:
         List of command arguments
     """
-    command = ["Rscript", script_path]
-    
-    # Add required arguments
-    command.extend(["--input", params['input_file']])
-    command.extend(["--output", params['output_dir']])
-    command.extend(["--name", params['sample_name']])
-    command.extend(["--genome", params['genome']])
+    command = [
+        "Rscript", script_path,
+        "--input", params['input_file'],
+        "--output", params['output_dir'],
+        "--name", params['sample_name'],
+        "--genome", params['genome']
+    ]
     
     # Add optional arguments
-    if 'ngene_chr' in params:
-        command.extend(["--ngene_chr", str(params['ngene_chr'])])
-    
-    if 'win_size' in params:
-        command.extend(["--win_size", str(params['win_size'])])
-    
-    if 'n_cores' in params:
-        command.extend(["--cores", str(params['n_cores'])])
-    
-    if 'LOW_DR' in params:
-        command.extend(["--low_dr", str(params['LOW_DR'])])
-    
-    if 'UP_DR' in params:
-        command.extend(["--up_dr", str(params['UP_DR'])])
-    
-    if 'KS_cut' in params:
-        command.extend(["--ks_cut", str(params['KS_cut'])])
-    
-    if 'distance' in params:
-        command.extend(["--distance", params['distance']])
-    
-    if 'cell_line' in params:
-        command.extend(["--cell_line", params['cell_line']])
+    command.extend(
+        arg
+        for key, flag in _OPTIONAL_R_ARGS if key in params
+        for arg in (flag, str(params[key]))
+    )
     
     return command
 
@@ -205,22 +272,23 @@ def find_output_directory(base_dir: str, sample_name: str) -> Optional[str]:
     Returns:
         Full path to output directory or None
     """
-    # TODO: Implement directory search
-    # Look for directories matching pattern: {sample_name}_*
-    # Return the most recent one
-    
-    base_path = Path(base_dir)
-    if not base_path.exists():
+    if not os.path.isdir(base_dir):
         return None
     
-    # Find directories starting with sample name
-    matching_dirs = list(base_path.glob(f"{sample_name}_*"))
+    # Single scandir pass: DirEntry caches the stat result, so each
+    # candidate costs one stat() and no Path allocation
+    prefix = f"{sample_name}_"
+    best = None
+    best_mtime = -1.0
     
-    if matching_dirs:
-        # Return most recent
-        return str(max(matching_dirs, key=lambda p: p.stat().st_mtime))
+    with os.scandir(base_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith(prefix) and entry.is_dir(follow_symlinks=False):
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+                if mtime > best_mtime:
+                    best_mtime, best = mtime, entry.path
     
-    return None
+    return best
 
 
 def locate_output_files(output_dir: str, sample_name: str) -> Dict[str, str]:
@@ -234,18 +302,27 @@ def locate_output_files(output_dir: str, sample_name: str) -> Dict[str, str]:
     Returns:
         Dictionary mapping file types to paths
     """
-    output_path = Path(output_dir)
-    
     files = {
-        'predictions': str(output_path / f"{sample_name}_copykat_prediction.txt"),
-        'cna_results': str(output_path / f"{sample_name}_copykat_CNA_results.txt"),
-        'heatmap': str(output_path / f"{sample_name}_copykat_heatmap.jpeg"),
-        'log': str(output_path / "logs" / "analysis.log"),
-        'report': str(output_path / f"{sample_name}_report.html")
+        'predictions': os.path.join(output_dir, f"{sample_name}_copykat_prediction.txt"),
+        'cna_results': os.path.join(output_dir, f"{sample_name}_copykat_CNA_results.txt"),
+        'cna_raw': os.path.join(output_dir, f"{sample_name}_copykat_CNA_raw_results_gene_by_cell.txt"),
+        'heatmap': os.path.join(output_dir, f"{sample_name}_copykat_heatmap.jpeg"),
+        'log': os.path.join(output_dir, "logs", "analysis.log"),
+        'report': os.path.join(output_dir, f"{sample_name}_report.html")
     }
     
-    # Verify files exist
-    existing_files = {k: v for k, v in files.items() if Path(v).exists()}
+    # Verify files exist: one directory listing instead of a stat per
+    # file; the nested log file still needs its own check
+    try:
+        with os.scandir(output_dir) as entries:
+            names = {entry.name for entry in entries}
+    except OSError:
+        return {}
+    
+    existing_files = {
+        k: v for k, v in files.items()
+        if (os.path.exists(v) if k == 'log' else os.path.basename(v) in names)
+    }
     
     return existing_files
 
@@ -265,28 +342,34 @@ def extract_summary_statistics(files: Dict[str, str]) -> Dict:
         'n_aneuploid': 0,
         'n_diploid': 0,
         'n_not_defined': 0,
-        'aneuploid_fraction': 0.0
+        'aneuploid_fraction': 0.0,
+        'class_counts': {}
     }
     
-    # TODO: Implement actual parsing
-    # Read predictions file and count cell types
+    # Only label counts are needed here, so a plain csv scan is enough;
+    # avoids importing pandas and materialising the whole table
     predictions_file = files.get('predictions')
     
-    if predictions_file and Path(predictions_file).exists():
+    if predictions_file and os.path.exists(predictions_file):
         try:
-            import pandas as pd
-            df = pd.read_csv(predictions_file, sep='\t')
-            
-            summary['n_cells'] = len(df)
-            
-            if 'copykat.pred' in df.columns:
-                counts = df['copykat.pred'].value_counts()
-                summary['n_aneuploid'] = counts.get('aneuploid', 0)
-                summary['n_diploid'] = counts.get('diploid', 0)
-                summary['n_not_defined'] = counts.get('not.defined', 0)
+            with open(predictions_file, 'r', newline='') as f:
+                reader = csv.reader(f, delimiter='\t')
+                header = next(reader, [])
                 
-                if summary['n_cells'] > 0:
-                    summary['aneuploid_fraction'] = summary['n_aneuploid'] / summary['n_cells']
+                if 'copykat.pred' in header:
+                    idx = header.index('copykat.pred')
+                    counts = Counter(row[idx] for row in reader if len(row) > idx)
+                    
+                    summary['n_cells'] = sum(counts.values())
+                    summary['n_aneuploid'] = counts['aneuploid']
+                    summary['n_diploid'] = counts['diploid']
+                    summary['n_not_defined'] = counts['not.defined']
+                    summary['class_counts'] = dict(counts)
+                    
+                    if summary['n_cells'] > 0:
+                        summary['aneuploid_fraction'] = summary['n_aneuploid'] / summary['n_cells']
+                else:
+                    summary['n_cells'] = sum(1 for _ in reader)
         
         except Exception:
             pass
@@ -301,7 +384,5 @@ def get_project_root() -> str:
     Returns:
         Project root directory path
     """
-    # TODO: Make this more robust
-    # For now, assume we're in backend/api/
-    return str(Path(__file__).parent.parent.parent)
+    return _PROJECT_ROOT
 
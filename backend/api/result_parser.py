@@ -6,9 +6,40 @@ Parse CopyKAT output files and extract data for frontend.
 Author: Backend Team Integration
 """
 
+import os
+import fnmatch
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
+
+
+# Result files found by parse_copykat_results (besides the log below)
+RESULT_FILE_PATTERNS = (
+    "*_copykat_prediction.txt",
+    "*_copykat_CNA_results.txt",
+    "*_copykat_heatmap.jpeg",
+    "*_report.html",
+)
+RESULT_LOG_FILE = os.path.join("logs", "analysis.log")
+
+# Parquet copies of parsed result tables, kept out of the results directories
+PARSE_CACHE_DIR = Path(
+    os.environ.get('COPYKAT_CACHE_DIR')
+    or os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'copykat', 'parsed')
+)
+
+# Parse cache limits; sidecars of deleted or moved results age out here
+PARSE_CACHE_MAX_BYTES = 1 << 30
+PARSE_CACHE_MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+
+# Mean copy number thresholds for chromosome classification
+AMPLIFIED_THRESHOLD = 2.3
+DELETED_THRESHOLD = 1.7
 
 
 def parse_copykat_results(output_dir: str) -> Dict:
@@ -24,12 +55,65 @@ def parse_copykat_results(output_dir: str) -> Dict:
             - cna_segments: DataFrame of CNV segments
             - summary: Dict of summary statistics
             - file_paths: Dict of file locations
+    
+    Note:
+        Results are memoized on the names and mtimes of all result files,
+        so repeated calls (e.g. Streamlit reruns) skip re-parsing until a
+        file is added or rewritten. The returned dictionaries are copies;
+        the DataFrames are shared with the cache and must not be modified.
     """
     output_path = Path(output_dir)
     
     if not output_path.exists():
         raise ValueError(f"Output directory not found: {output_dir}")
     
+    cached = _parse_copykat_results_cached(
+        os.path.abspath(output_dir), _results_signature(output_path)
+    )
+    
+    # Callers get their own dicts; the DataFrames are shared with the cache
+    results = dict(cached)
+    results['summary'] = dict(cached['summary'])
+    results['file_paths'] = dict(cached['file_paths'])
+    
+    return results
+
+
+def _results_signature(output_path: Path) -> Tuple:
+    """
+    Names and mtimes of every result file parse_copykat_results reads or reports.
+    
+    Any of these files being added, removed or rewritten changes the
+    signature, which invalidates the cached parse.
+    
+    Args:
+        output_path: Results directory
+    
+    Returns:
+        Sorted tuple of (name, mtime_ns) pairs
+    """
+    entries = []
+    
+    with os.scandir(output_path) as it:
+        for entry in it:
+            if any(fnmatch.fnmatchcase(entry.name, pattern) for pattern in RESULT_FILE_PATTERNS):
+                entries.append((entry.name, entry.stat().st_mtime_ns))
+    
+    try:
+        entries.append((RESULT_LOG_FILE, os.stat(output_path / RESULT_LOG_FILE).st_mtime_ns))
+    except OSError:
+        pass
+    
+    return tuple(sorted(entries))
+
+
+@lru_cache(maxsize=8)
+def _parse_copykat_results_cached(output_dir: str, signature: Tuple) -> Dict:
+    """
+    Parse a results directory; signature only serves to invalidate the cache.
+    """
+    output_path = Path(output_dir)
+    
     # Initialize result structure
     results = {
         'predictions': None,
@@ -38,17 +122,22 @@ def parse_copykat_results(output_dir: str) -> Dict:
         'file_paths': {}
     }
     
-    # Parse predictions
     predictions_file = find_file(output_path, "*_copykat_prediction.txt")
-    if predictions_file:
-        results['predictions'] = parse_predictions(predictions_file)
-        results['file_paths']['predictions'] = str(predictions_file)
-    
-    # Parse CNV segments
     cna_file = find_file(output_path, "*_copykat_CNA_results.txt")
-    if cna_file:
-        results['cna_segments'] = parse_cna_segments(cna_file)
-        results['file_paths']['cna_results'] = str(cna_file)
+    
+    # Parse predictions and CNV segments concurrently; both are
+    # independent I/O-bound reads and pandas' C parser releases the GIL
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        fut_pred = executor.submit(parse_predictions, predictions_file) if predictions_file else None
+        fut_cna = executor.submit(parse_cna_segments, cna_file) if cna_file else None
+        
+        if fut_pred:
+            results['predictions'] = fut_pred.result()
+            results['file_paths']['predictions'] = str(predictions_file)
+        
+        if fut_cna:
+            results['cna_segments'] = fut_cna.result()
+            results['file_paths']['cna_results'] = str(cna_file)
     
     # Find other files
     heatmap_file = find_file(output_path, "*_copykat_heatmap.jpeg")
@@ -59,7 +148,7 @@ def parse_copykat_results(output_dir: str) -> Dict:
     if report_file:
         results['file_paths']['report'] = str(report_file)
     
-    log_file = output_path / "logs" / "analysis.log"
+    log_file = output_path / RESULT_LOG_FILE
     if log_file.exists():
         results['file_paths']['log'] = str(log_file)
     
@@ -80,8 +169,19 @@ def parse_predictions(file_path: Path) -> pd.DataFrame:
     Returns:
         DataFrame with cell classifications
     """
+    cached = _read_parquet_sidecar(file_path)
+    if cached is not None:
+        return cached
+    
     try:
-        df = pd.read_csv(file_path, sep='\t')
+        df = pd.read_csv(
+            file_path,
+            sep='\t',
+            engine='c',
+            dtype={'copykat.pred': 'category'}
+        )
+        
+        _write_parquet_sidecar(df, file_path)
         return df
     except Exception as e:
         raise ValueError(f"Error parsing predictions file: {str(e)}")
@@ -97,13 +197,126 @@ def parse_cna_segments(file_path: Path) -> pd.DataFrame:
     Returns:
         DataFrame with CNV segments
     """
+    cached = _read_parquet_sidecar(file_path)
+    if cached is not None:
+        return cached
+    
     try:
         df = pd.read_csv(file_path, sep='\t')
+        
+        _write_parquet_sidecar(df, file_path)
         return df
     except Exception as e:
         raise ValueError(f"Error parsing CNA segments file: {str(e)}")
 
 
+def _sidecar_path(file_path: Path) -> Path:
+    """
+    Cache location of the Parquet copy of a TSV's current contents.
+    
+    The name is keyed on the source's absolute path, so sidecars never
+    land in (or get downloaded from) the results directory, plus its
+    mtime and size, so a rewritten file never matches an old copy.
+    
+    Args:
+        file_path: Path to the original TSV file
+    
+    Returns:
+        Path of the sidecar inside PARSE_CACHE_DIR
+    """
+    stat = os.stat(file_path)
+    return PARSE_CACHE_DIR / f"{_sidecar_key(file_path)}-{stat.st_mtime_ns}-{stat.st_size}.parquet"
+
+
+def _sidecar_key(file_path: Path) -> str:
+    """Stable cache key for a source file path."""
+    return hashlib.sha256(os.path.abspath(file_path).encode()).hexdigest()[:32]
+
+
+def _read_parquet_sidecar(file_path: Path) -> Optional[pd.DataFrame]:
+    """
+    Load the Parquet copy of a parsed TSV, if it is up to date.
+    
+    Args:
+        file_path: Path to the original TSV file
+    
+    Returns:
+        DataFrame, or None if there is no usable sidecar
+    """
+    try:
+        sidecar = _sidecar_path(file_path)
+        df = pd.read_parquet(sidecar)
+        
+        # Mark as recently used so pruning keeps it
+        os.utime(sidecar)
+        return df
+    except Exception:
+        # Missing/stale sidecar or pyarrow not installed
+        return None
+
+
+def _write_parquet_sidecar(df: pd.DataFrame, file_path: Path) -> None:
+    """
+    Cache a parsed TSV as Parquet in PARSE_CACHE_DIR for faster re-reads.
+    
+    Sidecars of older versions of the same file are removed, then the
+    cache is pruned (see _prune_parse_cache). Failures (unwritable cache,
+    pyarrow not installed) are ignored since the sidecar is only a cache.
+    
+    Args:
+        df: Parsed DataFrame
+        file_path: Path to the original TSV file
+    """
+    try:
+        sidecar = _sidecar_path(file_path)
+        sidecar.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp")
+        df.to_parquet(tmp_path, compression='zstd')
+        os.replace(tmp_path, sidecar)
+        
+        for stale in PARSE_CACHE_DIR.glob(f"{_sidecar_key(file_path)}-*.parquet"):
+            if stale != sidecar:
+                stale.unlink(missing_ok=True)
+        
+        _prune_parse_cache(keep=sidecar)
+    except Exception:
+        pass
+
+
+def _prune_parse_cache(keep: Path) -> None:
+    """
+    Bound the parse cache by age and total size.
+    
+    Files unused for PARSE_CACHE_MAX_AGE_SECONDS are removed, then the
+    least recently used ones until the cache fits in PARSE_CACHE_MAX_BYTES.
+    Reads refresh a sidecar's mtime, so mtime order is usage order.
+    
+    Args:
+        keep: Sidecar just written; never removed
+    """
+    entries = []
+    with os.scandir(PARSE_CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(('.parquet', '.tmp')) and entry.path != str(keep):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    
+    total = sum(size for _, size, _ in entries) + keep.stat().st_size
+    cutoff = time.time() - PARSE_CACHE_MAX_AGE_SECONDS
+    
+    # Oldest first; stop at the first file that is recent and fits
+    for mtime, size, path in sorted(entries):
+        if mtime >= cutoff and total <= PARSE_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
 def generate_summary(predictions: pd.DataFrame) -> Dict:
     """
     Generate summary statistics from predictions.
@@ -120,14 +333,22 @@ def generate_summary(predictions: pd.DataFrame) -> Dict:
         'n_diploid': 0,
         'n_not_defined': 0,
         'aneuploid_fraction': 0.0,
-        'mean_confidence': 0.0
+        'mean_confidence': 0.0,
+        'class_counts': {}
     }
     
     if 'copykat.pred' in predictions.columns:
-        counts = predictions['copykat.pred'].value_counts()
+        # Count on the categorical codes rather than hashing label strings
+        labels = predictions['copykat.pred'].astype('category')
+        codes = labels.cat.codes.to_numpy()
+        counts = dict(zip(
+            labels.cat.categories,
+            np.bincount(codes[codes >= 0], minlength=len(labels.cat.categories))
+        ))
         summary['n_aneuploid'] = int(counts.get('aneuploid', 0))
         summary['n_diploid'] = int(counts.get('diploid', 0))
         summary['n_not_defined'] = int(counts.get('not.defined', 0))
+        summary['class_counts'] = {str(label): int(n) for label, n in counts.items()}
         
         if summary['n_cells'] > 0:
             summary['aneuploid_fraction'] = summary['n_aneuploid'] / summary['n_cells']
@@ -149,9 +370,19 @@ def find_file(directory: Path, pattern: str) -> Optional[Path]:
     Returns:
         Path to file or None
     """
-    matches = list(directory.glob(pattern))
-    if matches:
-        return matches[0]
+    # Literal names need a single stat, not a directory walk
+    if '*' not in pattern and '?' not in pattern and '[' not in pattern:
+        candidate = os.path.join(directory, pattern)
+        return Path(candidate) if os.path.exists(candidate) else None
+    
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if fnmatch.fnmatchcase(entry.name, pattern):
+                    return Path(entry.path)
+    except OSError:
+        return None
+    
     return None
 
 
@@ -167,30 +398,29 @@ def extract_chromosome_summary(cna_segments: pd.DataFrame) -> Dict:
     """
     summary = {}
     
-    if 'chrom' not in cna_segments.columns:
+    if 'chrom' not in cna_segments.columns or 'copyNumber' not in cna_segments.columns:
         return summary
     
-    # Group by chromosome
-    for chrom in cna_segments['chrom'].unique():
-        chrom_data = cna_segments[cna_segments['chrom'] == chrom]
-        
-        # Calculate mean copy number
-        if 'copyNumber' in chrom_data.columns:
-            mean_cn = chrom_data['copyNumber'].mean()
-            
-            # Classify chromosome
-            if mean_cn > 2.3:
-                status = "Amplified"
-            elif mean_cn < 1.7:
-                status = "Deleted"
-            else:
-                status = "Normal"
-            
-            summary[chrom] = {
-                'mean_copy_number': mean_cn,
-                'status': status,
-                'n_segments': len(chrom_data)
-            }
+    # One grouped aggregation instead of a boolean mask per chromosome
+    stats = (
+        cna_segments.groupby('chrom', sort=False, observed=True)['copyNumber']
+        .agg(['mean', 'size'])
+    )
+    
+    # Classify chromosomes
+    mean_cn = stats['mean'].to_numpy()
+    status = np.select(
+        [mean_cn > AMPLIFIED_THRESHOLD, mean_cn < DELETED_THRESHOLD],
+        ['Amplified', 'Deleted'],
+        default='Normal'
+    )
+    
+    for chrom, mean, n_segments, chrom_status in zip(stats.index, mean_cn, stats['size'], status):
+        summary[chrom] = {
+            'mean_copy_number': float(mean),
+            'status': str(chrom_status),
+            'n_segments': int(n_segments)
+        }
     
     return summary
 
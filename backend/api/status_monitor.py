@@ -6,26 +6,44 @@ Monitor R process execution and provide progress updates.
 Author: Backend Team Integration
 """
 
+import os
 import time
 import subprocess
+from time import monotonic
 from pathlib import Path
-from typing import Dict, Generator, Optional
+from typing import Dict, Generator, Optional, Sequence
 from datetime import datetime
 
 
+# Bytes read from the end of the log when looking for progress
+LOG_TAIL_BYTES = 8192
+
+# Maximum time between progress checks, in seconds
+POLL_INTERVAL_SECONDS = 2
+
+# How often a log-watching wait checks whether the process has exited
+EXIT_CHECK_SECONDS = 0.25
+
+
 def monitor_analysis_progress(
     process: subprocess.Popen,
-    log_file: Optional[str] = None
+    log_file: Optional[str] = None,
+    output_lines: Optional[Sequence[str]] = None
 ) -> Generator[Dict, None, None]:
     """
     Monitor R process and yield progress updates.
     
     This generator yields status dictionaries that can be used to update
-    progress bars and status messages in the frontend.
+    progress bars and status messages in the frontend. Stages advance every
+    POLL_INTERVAL_SECONDS; log writes in between only yield when they
+    change the message.
     
     Args:
         process: Running subprocess.Popen object
         log_file: Optional path to log file to parse for progress
+        output_lines: Optional live buffer of process output lines (e.g.
+            from r_executor.start_output_reader); used instead of
+            re-reading the log file when given
     
     Yields:
         Dictionary with:
@@ -33,6 +51,8 @@ def monitor_analysis_progress(
             - message: Status message string
             - stage: Current stage name
             - complete: Boolean if process finished
+            - timestamp: ISO format timestamp string
+            - timestamp_ns: The same instant in ns since the epoch
     
     Example:
         >>> process = subprocess.Popen(command)
@@ -52,29 +72,48 @@ def monitor_analysis_progress(
     ]
     
     current_stage = 0
+    last_status = None
+    stage_deadline = monotonic() + POLL_INTERVAL_SECONDS
+    watcher = open_log_watch(log_file)
     
-    while process.poll() is None:
-        # Process still running
-        if current_stage < len(stages):
-            progress, message = stages[current_stage]
-            
-            # Check log file for more detailed progress
-            if log_file and Path(log_file).exists():
-                detailed_message = parse_log_for_progress(log_file)
+    try:
+        while process.poll() is None:
+            # Process still running
+            if current_stage < len(stages):
+                progress, message = stages[current_stage]
+                
+                # Prefer streamed output; fall back to the log file
+                detailed_message = None
+                if output_lines is not None:
+                    detailed_message = find_progress_message(list(output_lines)[-10:])
+                elif log_file and Path(log_file).exists():
+                    detailed_message = parse_log_for_progress(log_file)
+                
                 if detailed_message:
                     message = detailed_message
+                
+                # Early wake-ups that change nothing are not reported again
+                if (current_stage, message) != last_status:
+                    last_status = (current_stage, message)
+                    yield {
+                        'progress': progress,
+                        'message': message,
+                        'stage': f"Stage {current_stage + 1}/{len(stages)}",
+                        'complete': False,
+                        **_timestamps()
+                    }
             
-            yield {
-                'progress': progress,
-                'message': message,
-                'stage': f"Stage {current_stage + 1}/{len(stages)}",
-                'complete': False,
-                'timestamp': datetime.now().isoformat()
-            }
+            # Stages advance every POLL_INTERVAL_SECONDS regardless of log
+            # activity; log writes and process exit only wake the loop early
+            # to refresh the message
+            wait_for_update(process, watcher, timeout=max(0.0, stage_deadline - monotonic()))
             
-            current_stage += 1
-        
-        time.sleep(2)  # Check every 2 seconds
+            if monotonic() >= stage_deadline:
+                current_stage += 1
+                stage_deadline = monotonic() + POLL_INTERVAL_SECONDS
+    finally:
+        if watcher is not None:
+            watcher.close()
     
     # Process finished
     return_code = process.returncode
@@ -86,7 +125,7 @@ def monitor_analysis_progress(
             'stage': "Complete",
             'complete': True,
             'success': True,
-            'timestamp': datetime.now().isoformat()
+            **_timestamps()
         }
     else:
         yield {
@@ -96,10 +135,75 @@ def monitor_analysis_progress(
             'complete': True,
             'success': False,
             'error_code': return_code,
-            'timestamp': datetime.now().isoformat()
+            **_timestamps()
         }
 
 
+def open_log_watch(log_file: Optional[str]):
+    """
+    Watch a log file for writes using inotify, if available.
+    
+    Requires the optional inotify_simple package (Linux only); without
+    it the monitor still works, refreshing messages once per stage.
+    
+    Args:
+        log_file: Path to log file
+    
+    Returns:
+        INotify watcher or None if unavailable
+    """
+    if not log_file or not Path(log_file).exists():
+        return None
+    
+    try:
+        import inotify_simple
+        
+        watcher = inotify_simple.INotify()
+        watcher.add_watch(log_file, inotify_simple.flags.MODIFY)
+        return watcher
+    except (ImportError, OSError):
+        return None
+
+
+def wait_for_update(
+    process: subprocess.Popen,
+    watcher=None,
+    timeout: float = POLL_INTERVAL_SECONDS
+) -> bool:
+    """
+    Block until the log changes, the process exits, or timeout expires.
+    
+    With a watcher, the inotify read is done in EXIT_CHECK_SECONDS slices
+    with a process.poll() between them, since exit does not touch the log.
+    Exit is then noticed within one slice rather than at the timeout.
+    
+    Args:
+        process: Subprocess object
+        watcher: Optional INotify watcher from open_log_watch
+        timeout: Maximum wait in seconds
+    
+    Returns:
+        True if the full timeout elapsed with no activity, False otherwise
+    """
+    if watcher is not None:
+        deadline = monotonic() + timeout
+        
+        while process.poll() is None:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return True
+            if watcher.read(timeout=int(min(remaining, EXIT_CHECK_SECONDS) * 1000)):
+                return False
+        
+        return False
+    
+    try:
+        process.wait(timeout=timeout)
+        return False
+    except subprocess.TimeoutExpired:
+        return True
+
+
 def parse_log_for_progress(log_file: str) -> Optional[str]:
     """
     Parse log file to extract current progress message.
@@ -111,23 +215,67 @@ def parse_log_for_progress(log_file: str) -> Optional[str]:
         Latest progress message or None
     """
     try:
-        with open(log_file, 'r') as f:
-            lines = f.readlines()
+        # Only read the end of the file; the log can grow to megabytes
+        with open(log_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            offset = max(0, size - LOG_TAIL_BYTES)
+            f.seek(offset)
+            lines = f.read().decode('utf-8', 'replace').splitlines()
         
-        # Look for lines with "STEP" or "INFO"
-        for line in reversed(lines[-10:]):  # Check last 10 lines
-            if "STEP" in line or "INFO" in line:
-                # Extract message
-                parts = line.split(":", 2)
-                if len(parts) >= 3:
-                    return parts[2].strip()
+        if offset > 0 and lines:
+            lines = lines[1:]  # First line may be cut mid-way
         
-        return None
+        return find_progress_message(lines[-10:])  # Check last 10 lines
     
     except Exception:
         return None
 
 
+def find_progress_message(lines: Sequence[str]) -> Optional[str]:
+    """
+    Extract the latest progress message from log lines.
+    
+    Args:
+        lines: Log lines, oldest first
+    
+    Returns:
+        Latest progress message or None
+    """
+    # Look for lines with "STEP" or "INFO"
+    for line in reversed(lines):
+        if "STEP" in line or "INFO" in line:
+            # Extract message
+            parts = line.split(":", 2)
+            if len(parts) >= 3:
+                return parts[2].strip()
+    
+    return None
+
+
+def _timestamps() -> Dict:
+    """
+    Timestamp fields of a progress update, from a single clock read.
+    
+    Returns:
+        Dictionary with 'timestamp' (ISO string) and 'timestamp_ns'
+    """
+    timestamp_ns = time.time_ns()
+    return {'timestamp': format_ts(timestamp_ns), 'timestamp_ns': timestamp_ns}
+
+
+def format_ts(timestamp_ns: int) -> str:
+    """
+    Format a progress timestamp for display.
+    
+    Args:
+        timestamp_ns: Timestamp in nanoseconds since the epoch
+    
+    Returns:
+        ISO format timestamp string
+    """
+    return datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
+
+
 def estimate_runtime(n_cells: int, n_cores: int = 4) -> float:
     """
     Estimate analysis runtime based on cell count and cores.
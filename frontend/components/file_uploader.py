@@ -6,9 +6,37 @@ Reusable file upload widget with preview and validation.
 Author: Baovi Nguyen
 """
 
+import io
+import os
+import gzip
+import hashlib
+import itertools
+import tempfile
+from dataclasses import dataclass
 import streamlit as st
-import pandas as pd
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+# numpy/pandas/pyarrow are imported inside the functions that use them, so
+# pages importing this module only for paths and shapes don't load them
+if TYPE_CHECKING:
+    import pandas as pd
+
+from shared.constants import UPLOAD_FORMAT_OPTIONS
+
+
+# Slice size when hashing uploads
+HASH_CHUNK_BYTES = 1 << 20
+
+
+@dataclass(frozen=True)
+class UploadPreview:
+    """Parsed upload preview with its display values precomputed."""
+    df: "pd.DataFrame"
+    gene_preview: str
+    cell_preview: str
+    vmin: Optional[float]
+    vmax: Optional[float]
+    shape: Tuple[int, int]
 
 
 def file_uploader_component() -> Optional[st.runtime.uploaded_file_manager.UploadedFile]:
@@ -20,11 +48,11 @@ def file_uploader_component() -> Optional[st.runtime.uploaded_file_manager.Uploa
     """
     uploaded_file = st.file_uploader(
         "Upload Expression Matrix",
-        type=['txt', 'csv', 'tsv', 'gz'],
-        help="""
+        type=[ext.lstrip('.') for ext in UPLOAD_FORMAT_OPTIONS],
+        help=f"""
         Upload your gene expression matrix:
         - Format: genes in rows, cells in columns
-        - Supported: .txt, .csv, .tsv, .gz
+        - Supported: {', '.join(UPLOAD_FORMAT_OPTIONS)}
         - Max size: 200MB
         """
     )
@@ -43,6 +71,9 @@ def preview_data(uploaded_file) -> None:
     """
     Display preview of uploaded data.
     
+    Built on load_preview, so it shares the Upload page's parsing and
+    NaN-aware value range.
+    
     Args:
         uploaded_file: Streamlit UploadedFile object
     """
@@ -53,35 +84,304 @@ def preview_data(uploaded_file) -> None:
         else:
             sep = '\t'
         
-        # Read first few rows
-        df = pd.read_csv(uploaded_file, sep=sep, index_col=0, nrows=5)
-        
-        # Reset file pointer
-        uploaded_file.seek(0)
+        # Header + first 5 rows, cached per upload
+        preview = load_preview(upload_digest(uploaded_file), sep, uploaded_file, nrows=5)
         
         # Display success message
-        st.success(f"Loaded: {df.shape[0]} genes × {df.shape[1]} cells (preview)")
+        st.success(f"Loaded: {preview.shape[0]} genes × {preview.shape[1]} cells (preview)")
         
         # Show preview
         with st.expander("Preview Data"):
-            st.dataframe(df)
+            st.dataframe(preview.df)
         
         # Show summary
         with st.expander("Data Summary"):
             st.write("**First few gene names:**")
-            st.write(", ".join(df.index[:5].tolist()))
+            st.write(preview.gene_preview)
             
             st.write("**First few cell names:**")
-            st.write(", ".join(df.columns[:5].tolist()))
+            st.write(preview.cell_preview)
             
             st.write("**Value range (preview):**")
-            st.write(f"Min: {df.min().min():.2f}, Max: {df.max().max():.2f}")
+            if preview.vmin is not None:
+                st.write(f"Min: {preview.vmin:.2f}, Max: {preview.vmax:.2f}")
+            else:
+                st.write("No numeric values in preview")
     
     except Exception as e:
         st.error(f"Error previewing file: {str(e)}")
         st.info("Please ensure your file is properly formatted")
 
 
+def read_upload_head(uploaded_file, n_lines: int) -> bytes:
+    """
+    Read the leading lines of an uploaded file.
+    
+    Only the first n_lines lines are pulled from the stream (.gz uploads
+    are decompressed on the fly), so preview cost does not depend on the
+    upload size. The file pointer is reset afterwards.
+    
+    Args:
+        uploaded_file: Streamlit UploadedFile object
+        n_lines: Number of lines needed
+    
+    Returns:
+        Raw bytes of the first n_lines lines (or the whole file if shorter)
+    """
+    uploaded_file.seek(0)
+    
+    if uploaded_file.name.endswith('.gz'):
+        stream = gzip.GzipFile(fileobj=uploaded_file)
+    else:
+        stream = uploaded_file
+    
+    head = b''.join(itertools.islice(stream, n_lines))
+    uploaded_file.seek(0)
+    
+    return head
+
+
+def parse_preview(head: bytes, sep: str, nrows: int = 10) -> "pd.DataFrame":
+    """
+    Parse the leading lines of an expression matrix with PyArrow.
+    
+    Args:
+        head: Leading bytes of the file (see read_upload_head)
+        sep: Field separator
+        nrows: Number of data rows to keep
+    
+    Returns:
+        Arrow-backed DataFrame indexed by the first column (gene names)
+    """
+    import pandas as pd
+    import pyarrow.csv as pa_csv
+    
+    lines = head.split(b'\n')[:nrows + 1]
+    
+    # R-style matrices omit the row-name column from the header
+    delimiter = sep.encode()
+    if len(lines) > 1 and lines[0].count(delimiter) == lines[1].count(delimiter) - 1:
+        lines[0] = delimiter + lines[0]
+    
+    table = pa_csv.read_csv(
+        io.BytesIO(b'\n'.join(lines)),
+        parse_options=pa_csv.ParseOptions(delimiter=sep)
+    )
+    df = table.slice(0, nrows).to_pandas(types_mapper=pd.ArrowDtype)
+    df = df.set_index(df.columns[0])
+    df.index.name = df.index.name or None
+    
+    return df
+
+
+def upload_digest(uploaded_file) -> str:
+    """
+    SHA-256 content digest of an uploaded file, used as a cache key.
+    
+    Computed once per upload and kept in session state
+    (st.session_state.upload_digest) so other pages can reuse it.
+    
+    Args:
+        uploaded_file: Streamlit UploadedFile object
+    
+    Returns:
+        Hex digest string
+    """
+    if st.session_state.get('upload_file_id') == uploaded_file.file_id:
+        return st.session_state.upload_digest
+    
+    # Hash the in-memory buffer in 1 MiB slices; memoryview slicing avoids copies
+    h = hashlib.sha256()
+    buffer = uploaded_file.getbuffer()
+    for start in range(0, buffer.nbytes, HASH_CHUNK_BYTES):
+        h.update(buffer[start:start + HASH_CHUNK_BYTES])
+    digest = h.hexdigest()
+    st.session_state.upload_file_id = uploaded_file.file_id
+    st.session_state.upload_digest = digest
+    
+    return digest
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_preview(file_digest: str, sep: str, _uploaded_file, nrows: int = 10) -> UploadPreview:
+    """
+    Parse the preview of an uploaded file, cached by content digest.
+    
+    Reruns with the same upload return the cached preview without touching
+    the file; _uploaded_file is only read on a cache miss. Display strings
+    and the value range are computed here so reruns only read attributes.
+    
+    Args:
+        file_digest: Digest from upload_digest (cache key)
+        sep: Field separator
+        _uploaded_file: Streamlit UploadedFile object (not hashed)
+        nrows: Number of data rows to preview
+    
+    Returns:
+        UploadPreview for the first nrows rows
+    """
+    import numpy as np
+    
+    head = read_upload_head(_uploaded_file, n_lines=nrows + 1)
+    df = parse_preview(head, sep, nrows=nrows)
+    
+    # One pass over a single buffer instead of per-column min/max Series
+    values = df.select_dtypes('number').to_numpy(dtype='float64', na_value=np.nan)
+    
+    return UploadPreview(
+        df=df,
+        gene_preview=", ".join(map(str, df.index[:5])),
+        cell_preview=", ".join(map(str, df.columns[:5])),
+        vmin=float(np.nanmin(values)) if values.size else None,
+        vmax=float(np.nanmax(values)) if values.size else None,
+        shape=df.shape
+    )
+
+
+def session_temp_dir() -> str:
+    """
+    Scratch directory private to the current Streamlit session.
+    
+    The TemporaryDirectory object lives in session state, so the directory
+    and everything in it are removed when the session is discarded.
+    
+    Returns:
+        Path to the directory
+    """
+    tmp = st.session_state.get('session_tmpdir')
+    if tmp is None:
+        tmp = tempfile.TemporaryDirectory(prefix='copykat_')
+        st.session_state.session_tmpdir = tmp
+    
+    return tmp.name
+
+
+def _session_file(kind: str, key: str, suffix: str, write: Callable[[str], None]) -> str:
+    """
+    Create (or reuse) one file of a given kind in the session directory.
+    
+    Each kind keeps a single file: a new key replaces and deletes the
+    previous one, so repeated uploads do not accumulate on disk.
+    
+    Args:
+        kind: File role, e.g. 'matrix' or 'upload'
+        key: Content key; the file is rewritten when it changes
+        suffix: File name suffix
+        write: Callback writing the file at the given path
+    
+    Returns:
+        Path to the file
+    """
+    files = st.session_state.setdefault('session_files', {})
+    previous = files.get(kind)
+    
+    if previous is not None:
+        if previous[0] == key and os.path.exists(previous[1]):
+            return previous[1]
+        try:
+            os.remove(previous[1])
+        except OSError:
+            pass
+    
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=session_temp_dir())
+    os.close(fd)
+    write(path)
+    files[kind] = (key, path)
+    
+    return path
+
+
+def persist_matrix(file_digest: str, sep: str, uploaded_file) -> str:
+    """
+    Parse the full upload once and store it as Parquet.
+    
+    Pages after Upload load the matrix from this file (with column
+    pruning) instead of re-parsing the uploaded text. The file lives in
+    the session directory and is replaced by the next upload.
+    
+    Args:
+        file_digest: Digest from upload_digest (file is reused while it matches)
+        sep: Field separator
+        uploaded_file: Streamlit UploadedFile object
+    
+    Returns:
+        Path to the Parquet file
+    """
+    def _write(path: str) -> None:
+        import pandas as pd
+        
+        # C engine: accepts R-style headers with no row-name field
+        uploaded_file.seek(0)
+        df = pd.read_csv(
+            uploaded_file,
+            sep=sep,
+            index_col=0,
+            compression='gzip' if uploaded_file.name.endswith('.gz') else None
+        )
+        uploaded_file.seek(0)
+        df.to_parquet(path, compression='zstd')
+    
+    return _session_file('matrix', f"{file_digest}:{sep}", '.parquet', _write)
+
+
+def save_upload(file_digest: str, uploaded_file) -> str:
+    """
+    Write the raw upload to disk for the R script.
+    
+    The original file name is kept as the suffix so compressed uploads
+    are still recognised by their extension. The file lives in the
+    session directory and is replaced by the next upload.
+    
+    Args:
+        file_digest: Digest from upload_digest (file is reused while it matches)
+        uploaded_file: Streamlit UploadedFile object
+    
+    Returns:
+        Path to the saved file
+    """
+    def _write(path: str) -> None:
+        with open(path, 'wb') as f:
+            f.write(uploaded_file.getbuffer())
+    
+    return _session_file(
+        'upload', file_digest, f"_{os.path.basename(uploaded_file.name)}", _write
+    )
+
+
+def load_matrix(matrix_path: str, columns: Optional[List[str]] = None) -> "pd.DataFrame":
+    """
+    Load the persisted expression matrix.
+    
+    Args:
+        matrix_path: Path returned by persist_matrix
+        columns: Optional subset of cells to load
+    
+    Returns:
+        Expression matrix DataFrame (genes x cells)
+    """
+    import pandas as pd
+    
+    return pd.read_parquet(matrix_path, columns=columns)
+
+
+def matrix_shape(matrix_path: str) -> Tuple[int, int]:
+    """
+    Get (n_genes, n_cells) of the persisted matrix from Parquet metadata.
+    
+    Args:
+        matrix_path: Path returned by persist_matrix
+    
+    Returns:
+        Tuple of (n_genes, n_cells)
+    """
+    import pyarrow.parquet as pq
+    
+    metadata = pq.read_metadata(matrix_path)
+    n_index = len(pq.read_schema(matrix_path).pandas_metadata.get('index_columns', []))
+    
+    return metadata.num_rows, metadata.num_columns - n_index
+
+
 # TODO: Implement when validators are ready
 def validate_file(uploaded_file) -> Tuple[bool, list, list]:
     """
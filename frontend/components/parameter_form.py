@@ -9,6 +9,8 @@ Author: Baovi Nguyen
 import streamlit as st
 from typing import Optional, Dict
 
+from shared.utils import validate_sample_name
+
 
 def parameter_form_component() -> Optional[Dict]:
     """
@@ -66,7 +68,7 @@ def parameter_form_component() -> Optional[Dict]:
         
         if submit:
             # Validate
-            if not sample_name.replace('_', '').isalnum():
+            if not validate_sample_name(sample_name)[0]:
                 st.error("Invalid sample name")
                 return None
             
@@ -6,9 +6,30 @@ Display analysis results and plots.
 Author: Baovi Nguyen
 """
 
+import io
+import os
+import numpy as np
 import streamlit as st
 import pandas as pd
-from typing import Dict
+from typing import Dict, Tuple
+
+
+# Largest heatmap dimension (px) sent to the browser
+HEATMAP_MAX_PX = 2000
+
+# Interactive CNV heatmap: cells are subsampled above this count, then
+# mean-pooled onto a (cells, genomic bins) grid of at most this shape
+HEATMAP_MAX_CELLS = 10000
+CNV_BIN_GRID = (500, 500)
+
+# Bin position columns in CNA_results.txt (the rest are one column per cell)
+CNA_POSITION_COLUMNS = ['chrom', 'chrompos', 'abspos']
+
+# Columns of CopyKAT's prediction file shown in the results table
+PREDICTION_COLUMNS = ['cell.names', 'copykat.pred', 'copykat.confidence']
+
+# Histogram bins for the confidence distribution
+CONFIDENCE_BINS = 30
 
 
 def display_results(results: Dict) -> None:
@@ -63,24 +84,117 @@ def display_summary_statistics(results: Dict) -> None:
 
 def display_cnv_heatmap(results: Dict) -> None:
     """
-    Display CNV heatmap image.
+    Display CNV heatmap.
+    
+    Shows an interactive heatmap of the binned CNA matrix when available,
+    falling back to CopyKAT's static heatmap image.
     
     Args:
         results: Dictionary containing file paths
     """
     st.subheader("CNV Heatmap")
     
-    heatmap_path = results.get('files', {}).get('heatmap')
+    files = results.get('files', {})
+    cna_path = files.get('cna_results')
+    heatmap_path = files.get('heatmap')
+    
+    if cna_path:
+        try:
+            # Plotly is only needed once results exist; keep it off the import path
+            import plotly.graph_objects as go
+            
+            binned = _load_binned_cnv(cna_path, os.path.getmtime(cna_path))
+            fig = go.Figure(go.Heatmap(z=binned, colorscale='RdBu_r', zmid=0))
+            fig.update_layout(xaxis_title="Genomic bin", yaxis_title="Cell")
+            st.plotly_chart(fig, use_container_width=True)
+            return
+        except Exception as e:
+            st.error(f"Error loading CNV matrix: {str(e)}")
     
     if heatmap_path:
         try:
-            st.image(heatmap_path, use_column_width=True)
+            thumbnail, width = _heatmap_thumbnail(heatmap_path, os.path.getmtime(heatmap_path))
+            st.image(thumbnail, width=width)
         except Exception as e:
             st.error(f"Error loading heatmap: {str(e)}")
     else:
         st.warning("Heatmap not available")
 
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_binned_cnv(cna_path: str, mtime: float) -> np.ndarray:
+    """
+    Load CopyKAT's CNA matrix as a binned (cells x genomic bins) array.
+    
+    Only the binned grid is cached, so the full matrix is freed after
+    each load. mtime is only used to invalidate the cache.
+    """
+    df = pd.read_csv(cna_path, sep='\t')
+    df = df.drop(columns=CNA_POSITION_COLUMNS, errors='ignore')
+    matrix = df.select_dtypes('number').to_numpy(dtype=np.float32).T
+    
+    if matrix.shape[0] > HEATMAP_MAX_CELLS:
+        rng = np.random.default_rng(0)
+        keep = np.sort(rng.choice(matrix.shape[0], HEATMAP_MAX_CELLS, replace=False))
+        matrix = matrix[keep]
+    
+    return _bin_cnv(matrix)
+
+
+def _bin_cnv(matrix: np.ndarray, target=CNV_BIN_GRID) -> np.ndarray:
+    """
+    Mean-pool a 2D matrix onto a grid no larger than target.
+    
+    Args:
+        matrix: 2D array, e.g. cells x genomic bins
+        target: Maximum (rows, columns) of the result
+        
+    Returns:
+        Binned array; matrices already within target are returned as-is
+    """
+    rows, cols = matrix.shape
+    row_block = -(-rows // target[0])
+    col_block = -(-cols // target[1])
+    
+    if row_block == 1 and col_block == 1:
+        return matrix
+    
+    # Pad ragged edges with NaN so partial blocks average only real values
+    padded = np.full(
+        (-(-rows // row_block) * row_block, -(-cols // col_block) * col_block),
+        np.nan,
+        dtype=np.float32
+    )
+    padded[:rows, :cols] = matrix
+    blocks = padded.reshape(
+        padded.shape[0] // row_block, row_block,
+        padded.shape[1] // col_block, col_block
+    )
+    
+    return np.nanmean(blocks, axis=(1, 3))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _heatmap_thumbnail(heatmap_path: str, mtime: float, max_size: int = HEATMAP_MAX_PX) -> Tuple[bytes, int]:
+    """
+    Downsample a heatmap image server-side and encode it as PNG.
+    
+    CopyKAT heatmaps of large datasets can be tens of MB; sending a
+    bounded thumbnail keeps the browser responsive. Its pixel width is
+    returned too, so it can be shown at natural size without a reflow.
+    mtime is only used to invalidate the cache when the file changes.
+    """
+    from PIL import Image
+    
+    with Image.open(heatmap_path) as img:
+        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        width = img.width
+    
+    return buffer.getvalue(), width
+
+
 def display_predictions_table(results: Dict) -> None:
     """
     Display cell classification predictions table.
@@ -94,15 +208,20 @@ def display_predictions_table(results: Dict) -> None:
     
     if predictions_path:
         try:
-            df = pd.read_csv(predictions_path, sep='\t')
+            mtime = os.path.getmtime(predictions_path)
+            df = _load_predictions(predictions_path, mtime)
             
             # Display dataframe
             st.dataframe(df, use_container_width=True)
             
-            # Display distribution
+            # Display distribution, preferring counts stored at analysis end
             with st.expander("Classification Distribution"):
-                dist = df['copykat.pred'].value_counts()
-                st.bar_chart(dist)
+                class_counts = results.get('summary', {}).get('class_counts')
+                
+                if class_counts:
+                    st.bar_chart(pd.Series(class_counts, name='count'))
+                else:
+                    st.bar_chart(_pred_dist(predictions_path, mtime))
         
         except Exception as e:
             st.error(f"Error loading predictions: {str(e)}")
@@ -110,6 +229,43 @@ def display_predictions_table(results: Dict) -> None:
         st.warning("Predictions not available")
 
 
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=8)
+def _load_predictions(predictions_path: str, mtime: float) -> pd.DataFrame:
+    """
+    Read the displayed prediction columns into Arrow-backed dtypes.
+    
+    Falls back to the C parser with a categorical prediction column when
+    pyarrow is unavailable or an optional column (confidence) is absent.
+    mtime is only used to invalidate the cache.
+    """
+    try:
+        return pd.read_csv(
+            predictions_path,
+            sep='\t',
+            engine='pyarrow',
+            dtype_backend='pyarrow',
+            usecols=PREDICTION_COLUMNS
+        )
+    except (ImportError, KeyError, ValueError):
+        return pd.read_csv(
+            predictions_path,
+            sep='\t',
+            usecols=lambda col: col in PREDICTION_COLUMNS,
+            dtype={'copykat.pred': 'category'}
+        )
+
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=8)
+def _pred_dist(predictions_path: str, mtime: float) -> pd.Series:
+    """
+    Count cells per CopyKAT prediction, once per file version.
+    
+    Expander bodies run on every rerun even when collapsed, so the count
+    is cached alongside the table it is derived from.
+    """
+    return _load_predictions(predictions_path, mtime)['copykat.pred'].value_counts()
+
+
 def display_confidence_distribution(predictions_df: pd.DataFrame) -> None:
     """
     Display confidence score distribution.
@@ -120,7 +276,9 @@ def display_confidence_distribution(predictions_df: pd.DataFrame) -> None:
     st.subheader("Confidence Distribution")
     
     if 'copykat.confidence' in predictions_df.columns:
-        st.hist_chart(predictions_df['copykat.confidence'])
+        confidence = predictions_df['copykat.confidence'].dropna().to_numpy(dtype='float64')
+        counts, edges = np.histogram(confidence, bins=CONFIDENCE_BINS)
+        st.bar_chart(pd.Series(counts, index=edges[:-1].round(3), name='cells'))
     else:
         st.warning("Confidence scores not available")
 
@@ -7,16 +7,19 @@ Author: Baovi Nguyen
 """
 
 import streamlit as st
-import pandas as pd
 import sys
 from pathlib import Path
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
-# TODO: Import validators when implemented
-# from frontend.utils.validators import validate_expression_matrix
+from frontend.components.file_uploader import (
+    load_preview, upload_digest, persist_matrix, matrix_shape
+)
+from frontend.utils.validators import validate_matrix_file
+from shared.constants import UPLOAD_FORMAT_OPTIONS
 
 st.title("📤 Data Upload")
 
@@ -32,9 +35,9 @@ st.subheader("Upload Expression Matrix")
 
 uploaded_file = st.file_uploader(
     "Choose a file",
-    type=['txt', 'csv', 'tsv', 'gz'],
-    help="""
-    Supported formats: .txt, .csv, .tsv, .gz
+    type=[ext.lstrip('.') for ext in UPLOAD_FORMAT_OPTIONS],
+    help=f"""
+    Supported formats: {', '.join(UPLOAD_FORMAT_OPTIONS)}
     Maximum file size: 200MB
     """
 )
@@ -65,52 +68,66 @@ if uploaded_file is not None:
             else:
                 sep = '\t'
             
-            # Read first few rows
+            # Read first few rows; cached per upload so reruns skip parsing
             try:
-                df_preview = pd.read_csv(
-                    uploaded_file, 
-                    sep=sep, 
-                    index_col=0, 
-                    nrows=10
-                )
-                
-                # Reset file pointer
-                uploaded_file.seek(0)
+                digest = upload_digest(uploaded_file)
+                preview = load_preview(digest, sep, uploaded_file)
                 
-                # Display dimensions
+                # Display dimensions; the total fills in once the full parse is done
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.metric("Preview Genes", df_preview.shape[0])
+                    st.metric("Preview Genes", preview.shape[0])
                 with col2:
-                    st.metric("Preview Cells", df_preview.shape[1])
+                    st.metric("Preview Cells", preview.shape[1])
                 with col3:
-                    # Estimate total (rough approximation)
-                    st.metric("Estimated Total Genes", "> 1000")
+                    total_metric = st.empty()
                 
                 # Show preview
-                st.dataframe(df_preview.head(10), use_container_width=True)
+                st.dataframe(preview.df, use_container_width=True)
                 
                 # Data summary
                 with st.expander("📊 Data Summary"):
                     st.write("**First few gene names:**")
-                    st.write(", ".join(df_preview.index[:5].tolist()))
+                    st.write(preview.gene_preview)
                     
                     st.write("**First few cell names:**")
-                    st.write(", ".join(df_preview.columns[:5].tolist()))
+                    st.write(preview.cell_preview)
                     
                     st.write("**Value range (preview):**")
-                    st.write(f"Min: {df_preview.min().min():.2f}, Max: {df_preview.max().max():.2f}")
-                
-                # TODO: Add validation when validator is implemented
-                # is_valid, errors, warnings = validate_expression_matrix(df_preview)
-                # Display validation results
-                
-                st.success("✅ File uploaded successfully!")
-                st.info("👉 Go to the **Configure** page to set analysis parameters")
+                    if preview.vmin is not None:
+                        st.write(f"Min: {preview.vmin:.2f}, Max: {preview.vmax:.2f}")
+                    else:
+                        st.write("No numeric values in preview")
                 
             except Exception as e:
                 st.error(f"Error reading file: {str(e)}")
                 st.info("Please ensure your file is properly formatted")
+                st.stop()
+        
+        # Parse the full matrix once, after the preview has rendered;
+        # later pages read the Parquet copy
+        try:
+            with st.spinner("Preparing expression matrix..."):
+                st.session_state.matrix_path = persist_matrix(digest, sep, uploaded_file)
+            n_genes, n_cells = matrix_shape(st.session_state.matrix_path)
+            total_metric.metric("Total Genes × Cells", f"{n_genes:,} × {n_cells:,}")
+            
+            # Validate the full matrix; cached per upload like the Parquet copy
+            is_valid, errors, warnings = validate_matrix_file(
+                f"{digest}:{sep}", st.session_state.matrix_path
+            )
+            for error in errors:
+                st.error(error)
+            for warning in warnings:
+                st.warning(warning)
+            
+            if is_valid:
+                st.success("✅ File uploaded successfully!")
+                st.info("👉 Go to the **Configure** page to set analysis parameters")
+        except Exception as e:
+            st.session_state.pop('matrix_path', None)
+            total_metric.metric("Total Genes × Cells", "N/A")
+            st.error(f"Error parsing full matrix: {str(e)}")
     
     except Exception as e:
         st.error(f"Error processing file: {str(e)}")
@@ -138,7 +155,7 @@ else:
             st.info("Loading example dataset...")
             # Load glioblastoma data
             # st.session_state.uploaded_file = ...
-            st.experimental_rerun()
+            st.rerun()
     
     with col2:
         st.markdown("**Melanoma Dataset**")
@@ -151,7 +168,7 @@ else:
             st.info("Loading example dataset...")
             # Load melanoma data
             # st.session_state.uploaded_file = ...
-            st.experimental_rerun()
+            st.rerun()
 
 # Data requirements
 with st.expander("ℹ️ Data Requirements"):
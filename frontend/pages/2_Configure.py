@@ -7,25 +7,59 @@ Author: Baovi Nguyen
 """
 
 import streamlit as st
+import os
 import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
-# TODO: Import backend API when implemented
-# from backend.api.r_executor import run_copykat_analysis
+from frontend.components.file_uploader import (
+    matrix_shape, save_upload, session_temp_dir, upload_digest
+)
+from backend.api.r_executor import run_copykat_analysis
+from backend.api.status_monitor import POLL_INTERVAL_SECONDS, estimate_runtime, parse_log_for_progress
+from shared.constants import DISTANCE_OPTIONS, GENOME_OPTIONS, RESULTS_DIR
+from shared.utils import validate_sample_name
+
+
+@st.cache_resource
+def _job_executor() -> ThreadPoolExecutor:
+    """
+    Shared single-worker executor for R runs.
+    
+    Runs execute off the script thread so the page stays responsive;
+    one worker keeps concurrent submissions from competing for cores.
+    The executor is shared by all sessions, so a submitted job may wait
+    in the queue behind another user's run.
+    """
+    return ThreadPoolExecutor(max_workers=1)
+
+
+# Read session state once per rerun; widgets below use these locals
+ss = st.session_state
+uploaded_file = ss.get('uploaded_file')
+matrix_path = ss.get('matrix_path')
 
 st.title("⚙️ Configure Analysis")
 
 # Check if file is uploaded
-if not st.session_state.get('uploaded_file'):
+if not uploaded_file:
     st.warning("⚠️ Please upload a file first on the **Upload** page")
     st.stop()
 
 st.success("✅ File uploaded and ready for analysis")
 
+# Matrix dimensions come from the Parquet copy's metadata; no data is read
+if matrix_path:
+    n_genes, n_cells = matrix_shape(matrix_path)
+    st.caption(f"Expression matrix: {n_genes:,} genes × {n_cells:,} cells")
+
 st.markdown("""
 Configure the CopyKAT analysis parameters below. Default values work well for most datasets.
 """)
@@ -45,7 +79,7 @@ with st.form("analysis_parameters"):
         
         genome = st.selectbox(
             "Reference Genome",
-            options=["hg20", "mm10"],
+            options=GENOME_OPTIONS,
             index=0,
             format_func=lambda x: "Human (hg20)" if x == "hg20" else "Mouse (mm10)",
             help="Select the organism for your sample"
@@ -70,7 +104,7 @@ with st.form("analysis_parameters"):
         
         distance = st.selectbox(
             "Distance Metric",
-            options=["euclidean", "pearson", "spearman"],
+            options=DISTANCE_OPTIONS,
             index=0,
             help="Method for measuring cell similarity"
         )
@@ -146,9 +180,15 @@ with st.form("analysis_parameters"):
     )
     
     if submit:
+        # Reject before touching session state; the running job still reads it
+        if ss.get('analysis_job') is not None:
+            st.warning("An analysis is already running. Please wait for it to finish.")
+            st.stop()
+        
         # Validate parameters
-        if not sample_name or not sample_name.replace('_', '').isalnum():
-            st.error("Sample name must be alphanumeric (underscores allowed)")
+        name_ok, name_error = validate_sample_name(sample_name)
+        if not name_ok:
+            st.error(name_error)
             st.stop()
         
         if up_dr < low_dr:
@@ -156,7 +196,7 @@ with st.form("analysis_parameters"):
             st.stop()
         
         # Save parameters to session state
-        st.session_state.analysis_params = {
+        ss.analysis_params = {
             'sample_name': sample_name,
             'genome': genome,
             'cell_line': cell_line,
@@ -170,37 +210,32 @@ with st.form("analysis_parameters"):
             'plot_genes': plot_genes
         }
         
-        # Run analysis
-        st.session_state.analysis_running = True
+        fd, log_file = tempfile.mkstemp(prefix=f"{sample_name}_", suffix='.log', dir=session_temp_dir())
+        os.close(fd)
         
-        with st.spinner("Running CopyKAT analysis... This may take 5-15 minutes."):
-            # Progress tracking
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            status_text.text("Step 1/5: Preparing data...")
-            progress_bar.progress(0.1)
-            
-            # TODO: Implement backend call when API is ready
-            # try:
-            #     result = run_copykat_analysis(st.session_state.analysis_params)
-            #     
-            #     if result['success']:
-            #         st.session_state.results = result
-            #         st.success("✅ Analysis complete!")
-            #         st.info("👉 Go to the **Results** page to view outputs")
-            #     else:
-            #         st.error(f"Analysis failed: {result['error']}")
-            # except Exception as e:
-            #     st.error(f"Error running analysis: {str(e)}")
-            
-            # Placeholder for now
-            status_text.text("Step 5/5: Complete!")
-            progress_bar.progress(1.0)
-            st.warning("⚠️ Backend integration pending. This is a placeholder.")
-            st.info("When implemented, results will appear in the Results page.")
+        # Backend expects CopyKAT's argument names for the tuning parameters
+        backend_params = {
+            'input_file': save_upload(upload_digest(uploaded_file), uploaded_file),
+            'sample_name': sample_name,
+            'output_dir': str(RESULTS_DIR),
+            'genome': genome,
+            'cell_line': cell_line,
+            'n_cores': n_cores,
+            'distance': distance,
+            'ngene_chr': ngene_chr,
+            'win_size': win_size,
+            'KS_cut': ks_cut,
+            'LOW_DR': low_dr,
+            'UP_DR': up_dr,
+            'plot_genes': plot_genes,
+            'log_file': log_file
+        }
         
-        st.session_state.analysis_running = False
+        # Run analysis in the background; the block below polls for completion
+        ss.analysis_running = True
+        ss.analysis_log = log_file
+        ss.analysis_started = time.time()
+        ss.analysis_job = _job_executor().submit(run_copykat_analysis, backend_params)
 
 # Parameter reference
 with st.expander("📖 Parameter Guide"):
@@ -225,3 +260,38 @@ with st.expander("📖 Parameter Guide"):
     **Advanced Parameters**: See [Parameter Reference](../docs/03_PARAMETERS_REFERENCE.md) for details
     """)
 
+# Poll a running analysis without blocking widget interaction
+job = ss.get('analysis_job')
+
+if job is not None and not job.done():
+    if not job.running():
+        # Queued behind another session's run; elapsed time starts once it runs
+        ss.analysis_started = time.time()
+        st.info("Waiting for another analysis to finish before starting...")
+    else:
+        elapsed = (time.time() - ss.analysis_started) / 60
+        n_cells = matrix_shape(matrix_path)[1] if matrix_path else 0
+        expected = estimate_runtime(n_cells, ss.analysis_params['n_cores'])
+        
+        st.info("Running CopyKAT analysis... This may take 5-15 minutes.")
+        st.progress(min(elapsed / expected, 0.99))
+        st.text(parse_log_for_progress(ss.analysis_log) or "Starting R...")
+    
+    time.sleep(POLL_INTERVAL_SECONDS)
+    st.rerun()
+
+elif job is not None:
+    ss.analysis_job = None
+    ss.analysis_running = False
+    
+    try:
+        result = job.result()
+        
+        if result['success']:
+            ss.results = result
+            st.success("✅ Analysis complete!")
+            st.info("👉 Go to the **Results** page to view outputs")
+        else:
+            st.error(f"Analysis failed: {result['error']}")
+    except Exception as e:
+        st.error(f"Error running analysis: {str(e)}")
@@ -12,15 +12,24 @@ from pathlib import Path
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from frontend.components.file_uploader import matrix_shape
 
 # TODO: Import result parser when implemented
 # from backend.api.result_parser import parse_copykat_results
 
+# Read session state once per rerun; widgets below use these locals
+ss = st.session_state
+results = ss.get('results')
+params = ss.get('analysis_params')
+matrix_path = ss.get('matrix_path')
+
 st.title("📊 Analysis Results")
 
 # Check if analysis is complete
-if not st.session_state.get('results'):
+if not results:
     st.warning("⚠️ No results available yet")
     st.info("Run an analysis on the **Configure** page first")
     st.stop()
@@ -28,7 +37,6 @@ if not st.session_state.get('results'):
 st.success("✅ Displaying analysis results")
 
 # TODO: Load and display actual results when backend is ready
-# results = st.session_state.results
 
 # Placeholder results display
 st.subheader("Summary Statistics")
@@ -96,11 +104,16 @@ with st.expander("📊 Additional Visualizations"):
 # Analysis info
 with st.expander("ℹ️ Analysis Information"):
     st.markdown("**Parameters Used:**")
-    if st.session_state.get('analysis_params'):
-        for key, value in st.session_state.analysis_params.items():
+    if params:
+        for key, value in params.items():
             st.write(f"- **{key}**: {value}")
     else:
         st.write("No parameter information available")
+    
+    if matrix_path:
+        n_genes, n_cells = matrix_shape(matrix_path)
+        st.markdown("**Input Matrix:**")
+        st.write(f"- {n_genes:,} genes × {n_cells:,} cells")
 
 st.markdown("---")
 st.info("👉 Go to the **Download** page to export results")
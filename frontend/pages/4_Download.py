@@ -7,17 +7,101 @@ Author: Baovi Nguyen
 """
 
 import streamlit as st
+import functools
+import hashlib
+import os
 import sys
+import zipfile
 from pathlib import Path
+from typing import BinaryIO, Dict, Tuple
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from frontend.components.file_uploader import session_temp_dir
+
+
+def _zip_path(files: Tuple[Tuple[str, int], ...]) -> str:
+    """
+    Session-private path of the ZIP archive for a set of result files.
+    
+    Args:
+        files: (path, mtime_ns) pairs; a changed file gives a new path
+    
+    Returns:
+        Path inside the session directory (the file may not exist yet)
+    """
+    key = hashlib.sha256(repr(files).encode()).hexdigest()[:16]
+    return os.path.join(session_temp_dir(), f"copykat_results_{key}.zip")
+
+
+def _open_zip(zip_path: str, files: Tuple[Tuple[str, int], ...]) -> BinaryIO:
+    """
+    Open the ZIP archive of result files, building it on first use.
+    
+    Files are streamed into the archive on disk with fast compression, so
+    building it holds one zipfile chunk in memory, not the archive. Later
+    clicks reuse the file. Streamlit reads the returned handle into its
+    download storage, which is the only in-memory copy. Archives of older
+    result sets in the same directory are deleted.
+    
+    Runs when the button is clicked, outside the script thread, so it
+    takes the path instead of reading session state.
+    
+    Args:
+        zip_path: Path from _zip_path
+        files: (path, mtime_ns) pairs to archive
+    
+    Returns:
+        Archive opened for binary reading
+    """
+    if not os.path.exists(zip_path):
+        tmp_path = f"{zip_path}.tmp"
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for path, _ in files:
+                zf.write(path, arcname=os.path.basename(path))
+        os.replace(tmp_path, zip_path)
+        
+        zip_dir = os.path.dirname(zip_path)
+        for name in os.listdir(zip_dir):
+            if name.startswith('copykat_results_') and name.endswith('.zip'):
+                if os.path.join(zip_dir, name) != zip_path:
+                    os.remove(os.path.join(zip_dir, name))
+    
+    return open(zip_path, 'rb')
+
+
+def _file_download_button(files: Dict, key: str, **kwargs) -> None:
+    """
+    Download button that reads its result file only when clicked.
+    
+    The button is disabled when the file was not produced.
+    
+    Args:
+        files: Result file paths keyed by output type
+        key: Output type to offer for download
+        **kwargs: Passed through to st.download_button
+    """
+    path = files.get(key)
+    available = bool(path) and os.path.isfile(path)
+    
+    st.download_button(
+        data=functools.partial(Path(path).read_bytes) if available else b"",
+        disabled=not available,
+        **kwargs
+    )
+
+
+# Read session state once per rerun; widgets below use these locals
+ss = st.session_state
+results = ss.get('results')
 
 st.title("💾 Download Results")
 
 # Check if results exist
-if not st.session_state.get('results'):
+if not results:
     st.warning("⚠️ No results available to download")
     st.info("Complete an analysis on the **Configure** page first")
     st.stop()
@@ -28,7 +112,9 @@ st.markdown("""
 Download your analysis results in various formats below.
 """)
 
-# File downloads section
+result_files = results.get('files', {}) if isinstance(results, dict) else {}
+
+# File downloads section; payloads are read only when a button is clicked
 st.subheader("📁 Output Files")
 
 col1, col2 = st.columns(2)
@@ -36,69 +122,61 @@ col1, col2 = st.columns(2)
 with col1:
     st.markdown("**Primary Outputs**")
     
-    # TODO: Implement actual file downloads when backend is ready
-    
     # Predictions
-    st.download_button(
+    _file_download_button(
+        result_files, 'predictions',
         label="📄 Cell Classifications (TXT)",
-        data="Placeholder data",
         file_name="copykat_predictions.txt",
         mime="text/plain",
-        help="Cell-level classification results",
-        disabled=True  # Enable when backend is ready
+        help="Cell-level classification results"
     )
     
     # CNV results
-    st.download_button(
+    _file_download_button(
+        result_files, 'cna_results',
         label="📄 CNV Segments (TXT)",
-        data="Placeholder data",
         file_name="copykat_CNA_results.txt",
         mime="text/plain",
-        help="Segment-level CNV calls",
-        disabled=True
+        help="Segment-level CNV calls"
     )
     
     # Heatmap
-    st.download_button(
+    _file_download_button(
+        result_files, 'heatmap',
         label="🖼️ CNV Heatmap (JPEG)",
-        data=b"Placeholder",
         file_name="copykat_heatmap.jpeg",
         mime="image/jpeg",
-        help="CNV heatmap visualization",
-        disabled=True
+        help="CNV heatmap visualization"
     )
 
 with col2:
     st.markdown("**Additional Outputs**")
     
     # Report
-    st.download_button(
+    _file_download_button(
+        result_files, 'report',
         label="📊 HTML Report",
-        data="<html>Placeholder</html>",
         file_name="analysis_report.html",
         mime="text/html",
-        help="Comprehensive analysis report",
-        disabled=True
+        help="Comprehensive analysis report"
     )
     
     # Log file
-    st.download_button(
+    _file_download_button(
+        result_files, 'log',
         label="📝 Analysis Log",
-        data="Placeholder log",
         file_name="analysis.log",
         mime="text/plain",
-        help="Detailed execution log",
-        disabled=True
+        help="Detailed execution log"
     )
     
     # Raw CNV matrix
-    st.download_button(
+    _file_download_button(
+        result_files, 'cna_raw',
         label="📄 Gene-level CNV (TXT)",
-        data="Placeholder data",
-        file_name="copykat_CNA_raw_results.txt",
+        file_name="copykat_CNA_raw_results_gene_by_cell.txt",
         mime="text/plain",
-        help="Gene-by-cell CNV matrix",
-        disabled=True
+        help="Gene-by-cell CNV matrix"
     )
 
 st.markdown("---")
@@ -108,16 +186,31 @@ st.subheader("📦 Batch Download")
 
 st.markdown("Download all results in a single archive:")
 
-# TODO: Implement zip download
-st.download_button(
-    label="⬇️ Download All (ZIP)",
-    data=b"Placeholder",
-    file_name="copykat_results.zip",
-    mime="application/zip",
-    help="All analysis outputs in one file",
-    disabled=True
+zip_files = tuple(
+    (path, os.stat(path).st_mtime_ns)
+    for path in result_files.values()
+    if path and os.path.isfile(path)
 )
 
+if zip_files:
+    # The archive is built on disk on the first click, then reused
+    st.download_button(
+        label="⬇️ Download All (ZIP)",
+        data=functools.partial(_open_zip, _zip_path(zip_files), zip_files),
+        file_name="copykat_results.zip",
+        mime="application/zip",
+        help="All analysis outputs in one file"
+    )
+else:
+    st.download_button(
+        label="⬇️ Download All (ZIP)",
+        data=b"Placeholder",
+        file_name="copykat_results.zip",
+        mime="application/zip",
+        help="All analysis outputs in one file",
+        disabled=True
+    )
+
 st.markdown("---")
 
 # Export to other formats
@@ -152,7 +245,7 @@ with st.expander("📋 File Descriptions"):
     **CNV Heatmap (copykat_heatmap.jpeg)**:
     - Visual representation of CNV across genome
     
-    **Gene-level CNV (copykat_CNA_raw_results.txt)**:
+    **Gene-level CNV (copykat_CNA_raw_results_gene_by_cell.txt)**:
     - Full gene-by-cell copy number matrix
     
     **HTML Report**:
@@ -10,12 +10,14 @@ Date: October 2024
 """
 
 import streamlit as st
+import copy
 import sys
 from pathlib import Path
 
 # Add project root to path for imports
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
 # Page configuration (must be first Streamlit command)
 st.set_page_config(
@@ -37,49 +39,33 @@ st.set_page_config(
     }
 )
 
-# Custom CSS for better UI
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3rem;
-        font-weight: bold;
-        color: #1f77b4;
-        text-align: center;
-        padding: 1rem 0;
-    }
-    .sub-header {
-        font-size: 1.2rem;
-        color: #666;
-        text-align: center;
-        padding-bottom: 2rem;
-    }
-    .info-box {
-        background-color: #f0f8ff;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #1f77b4;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for better UI, kept in static/app.css. The <style> block is
+# still sent on every rerun (Streamlit has no once-per-session head hook);
+# the cache only saves re-reading the file
+@st.cache_resource
+def _load_css() -> str:
+    """Return the app stylesheet wrapped in a <style> tag"""
+    css = (Path(__file__).parent / "static" / "app.css").read_text()
+    return f"<style>\n{css}</style>"
+
+st.markdown(_load_css(), unsafe_allow_html=True)
 
 # Initialize session state
+_SESSION_DEFAULTS = {
+    'uploaded_file': None,
+    'analysis_params': {},
+    'analysis_running': False,
+    'results': None,
+    'current_page': 'Home'
+}
+
 def init_session_state():
     """Initialize session state variables"""
-    if 'uploaded_file' not in st.session_state:
-        st.session_state.uploaded_file = None
-    
-    if 'analysis_params' not in st.session_state:
-        st.session_state.analysis_params = {}
-    
-    if 'analysis_running' not in st.session_state:
-        st.session_state.analysis_running = False
-    
-    if 'results' not in st.session_state:
-        st.session_state.results = None
-    
-    if 'current_page' not in st.session_state:
-        st.session_state.current_page = 'Home'
+    for key, value in _SESSION_DEFAULTS.items():
+        # Copy so sessions never share the mutable defaults; only on
+        # first run, not on every rerun of an initialized session
+        if key not in st.session_state:
+            st.session_state[key] = copy.copy(value)
 
 init_session_state()
 
@@ -97,8 +83,7 @@ def main():
     
     # Sidebar
     with st.sidebar:
-        st.image("https://via.placeholder.com/200x80?text=CNV+Analysis", 
-                 use_column_width=True)
+        st.image("https://via.placeholder.com/200x80?text=CNV+Analysis", width=200)
         st.markdown("---")
         
         st.header("Navigation")
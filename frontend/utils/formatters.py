@@ -7,8 +7,15 @@ Author: Baovi Nguyen
 """
 
 from datetime import datetime
+from functools import lru_cache
 from typing import Union
 
+from shared.utils import bytes_to_human_readable
+
+
+# Display format for timestamps (e.g., "Oct 29, 2024 12:00 PM")
+TIMESTAMP_FORMAT = "%b %d, %Y %I:%M %p"
+
 
 def format_file_size(size_bytes: int) -> str:
     """
@@ -20,11 +27,7 @@ def format_file_size(size_bytes: int) -> str:
     Returns:
         Formatted string (e.g., "1.5 MB")
     """
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.1f} TB"
+    return bytes_to_human_readable(size_bytes)
 
 
 def format_timestamp(timestamp: Union[str, datetime]) -> str:
@@ -37,15 +40,28 @@ def format_timestamp(timestamp: Union[str, datetime]) -> str:
     Returns:
         Formatted string (e.g., "Oct 29, 2024 12:00 PM")
     """
-    if isinstance(timestamp, str):
-        try:
-            dt = datetime.fromisoformat(timestamp)
-        except ValueError:
-            return timestamp
-    else:
-        dt = timestamp
+    try:
+        return _format_iso_timestamp(timestamp)
+    except TypeError:
+        # datetime objects; fromisoformat only accepts strings
+        return timestamp.strftime(TIMESTAMP_FORMAT)
+
+
+@lru_cache(maxsize=256)
+def _format_iso_timestamp(timestamp: str) -> str:
+    """
+    Format an ISO timestamp string, memoized across reruns.
+    
+    Args:
+        timestamp: ISO format timestamp string
     
-    return dt.strftime("%b %d, %Y %I:%M %p")
+    Returns:
+        Formatted string, or the input if it is not ISO format
+    """
+    try:
+        return datetime.fromisoformat(timestamp).strftime(TIMESTAMP_FORMAT)
+    except ValueError:
+        return timestamp
 
 
 def format_percentage(value: float, decimals: int = 1) -> str:
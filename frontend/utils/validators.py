@@ -6,11 +6,23 @@ Validate user inputs and uploaded data.
 Author: Baovi Nguyen
 """
 
-import pandas as pd
-from typing import Tuple, List, Dict
+import streamlit as st
+from typing import TYPE_CHECKING, Tuple, List, Dict
 
+# numpy/pandas are imported inside the functions that use them, so pages
+# importing this module only for parameter checks don't load them
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
-def validate_expression_matrix(df: pd.DataFrame) -> Tuple[bool, List[str], List[str]]:
+from shared.constants import SUPPORTED_GENOMES
+from shared.utils import validate_sample_name
+
+# Rows per block when scanning matrix values; bounds temporary mask memory
+SCAN_BLOCK_ROWS = 4096
+
+
+def validate_expression_matrix(df: "pd.DataFrame") -> Tuple[bool, List[str], List[str]]:
     """
     Validate expression matrix structure and content.
     
@@ -34,17 +46,16 @@ def validate_expression_matrix(df: pd.DataFrame) -> Tuple[bool, List[str], List[
     if n_genes < 1000:
         warnings.append(f"Low gene count ({n_genes}). Recommended: 5000+ genes")
     
-    # Check for missing values
-    if df.isnull().any().any():
-        n_missing = df.isnull().sum().sum()
+    # Check for missing, negative and infinite values in one scan
+    n_missing, has_negative, has_infinite = _scan_frame(df)
+    
+    if n_missing:
         warnings.append(f"Found {n_missing} missing values")
     
-    # Check for negative values
-    if (df < 0).any().any():
+    if has_negative:
         errors.append("Found negative values. Expression data should be non-negative")
     
-    # Check for infinite values
-    if df.isin([float('inf'), float('-inf')]).any().any():
+    if has_infinite:
         errors.append("Found infinite values")
     
     # Check row/column names
@@ -54,20 +65,179 @@ def validate_expression_matrix(df: pd.DataFrame) -> Tuple[bool, List[str], List[
     if df.columns.empty:
         errors.append("Missing cell names (column names)")
     
-    # Check for duplicates
-    if df.index.duplicated().any():
-        n_dup = df.index.duplicated().sum()
-        warnings.append(f"Found {n_dup} duplicate gene names")
+    # Check for duplicates; one hash pass per axis gives the count directly
+    n_dup_genes = len(df.index) - df.index.nunique(dropna=False)
+    if n_dup_genes:
+        warnings.append(f"Found {n_dup_genes} duplicate gene names")
     
-    if df.columns.duplicated().any():
-        n_dup = df.columns.duplicated().sum()
-        errors.append(f"Found {n_dup} duplicate cell names")
+    n_dup_cells = len(df.columns) - df.columns.nunique(dropna=False)
+    if n_dup_cells:
+        errors.append(f"Found {n_dup_cells} duplicate cell names")
     
     is_valid = len(errors) == 0
     
     return is_valid, errors, warnings
 
 
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False, max_entries=4)
+def validate_matrix_file(matrix_key: str, _matrix_path: str) -> Tuple[bool, List[str], List[str]]:
+    """
+    Validate the persisted expression matrix, cached by upload.
+    
+    The key is the one persist_matrix uses (upload digest and separator),
+    so reruns and other sessions with the same upload skip loading and
+    scanning the matrix without hashing its values.
+    
+    Args:
+        matrix_key: Cache key, f"{upload_digest}:{sep}"
+        _matrix_path: Parquet file from persist_matrix (not hashed)
+    
+    Returns:
+        Tuple of (is_valid, errors, warnings)
+    """
+    import pandas as pd
+    
+    return validate_expression_matrix(pd.read_parquet(_matrix_path))
+
+
+def _scan_frame(df: "pd.DataFrame") -> Tuple[int, bool, bool]:
+    """
+    Run _scan_values over a matrix grouped by column dtype.
+    
+    A single-dtype dense matrix is scanned as one array without copying.
+    Mixed matrices are scanned one dtype group at a time, so integer count
+    columns keep their fast path instead of being upcast to float with the
+    rest. Sparse columns only scan their stored values plus the fill value.
+    
+    Args:
+        df: Expression matrix DataFrame
+    
+    Returns:
+        Tuple of (n_missing, has_negative, has_infinite)
+    """
+    import pandas as pd
+    
+    # Group column positions by dtype name; SparseDtype compares equal to
+    # its subtype, so the dtype objects themselves are not reliable keys
+    groups = {}
+    for position, dtype in enumerate(df.dtypes):
+        groups.setdefault(str(dtype), (dtype, []))[1].append(position)
+    
+    if len(groups) == 1:
+        dtype, _ = next(iter(groups.values()))
+        if not isinstance(dtype, pd.SparseDtype):
+            return _scan_values(_as_numeric(df))
+    
+    n_missing = 0
+    has_negative = False
+    has_infinite = False
+    
+    for dtype, positions in groups.values():
+        if isinstance(dtype, pd.SparseDtype):
+            results = [_scan_sparse(df.iloc[:, i].array) for i in positions]
+        else:
+            results = [_scan_values(_as_numeric(df.iloc[:, positions]))]
+        
+        for missing, negative, infinite in results:
+            n_missing += missing
+            has_negative = has_negative or negative
+            has_infinite = has_infinite or infinite
+    
+    return n_missing, has_negative, has_infinite
+
+
+def _as_numeric(df: "pd.DataFrame") -> "np.ndarray":
+    """
+    Matrix values as a NumPy array, mapping nullable/Arrow NA to NaN.
+    
+    Args:
+        df: Single-dtype DataFrame
+    
+    Returns:
+        Array of values (a view where possible)
+    """
+    import numpy as np
+    
+    dtype = df.dtypes.iloc[0] if len(df.columns) else None
+    
+    if dtype is None or isinstance(dtype, np.dtype):
+        return df.to_numpy(copy=False)
+    
+    return df.to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _scan_sparse(arr: "pd.arrays.SparseArray") -> Tuple[int, bool, bool]:
+    """
+    Scan a sparse column's stored values and its implicit fill value.
+    
+    Args:
+        arr: Sparse column values
+    
+    Returns:
+        Tuple of (n_missing, has_negative, has_infinite)
+    """
+    import numpy as np
+    
+    n_missing, has_negative, has_infinite = _scan_values(arr.sp_values)
+    n_fill = len(arr) - arr.sp_index.npoints
+    
+    if n_fill:
+        fill = float(arr.fill_value)
+        if np.isnan(fill):
+            n_missing += n_fill
+        else:
+            has_negative = has_negative or fill < 0
+            has_infinite = has_infinite or bool(np.isinf(fill))
+    
+    return n_missing, has_negative, has_infinite
+
+
+def _scan_values(arr: "np.ndarray") -> Tuple[int, bool, bool]:
+    """
+    Count missing values and flag negative/infinite ones in a single sweep.
+    
+    Integer matrices cannot hold NaN or inf, so only their minimum is
+    checked. Other matrices are scanned in row blocks: one isfinite mask
+    per block, with the NaN count only taken for blocks that need it.
+    Non-float blocks (e.g. object) are converted one block at a time.
+    
+    Args:
+        arr: Matrix values
+    
+    Returns:
+        Tuple of (n_missing, has_negative, has_infinite)
+    """
+    import numpy as np
+    
+    if arr.dtype.kind in 'iub':
+        has_negative = arr.dtype.kind == 'i' and arr.size > 0 and arr.min() < 0
+        return 0, bool(has_negative), False
+    
+    n_missing = 0
+    has_negative = False
+    has_infinite = False
+    
+    for start in range(0, arr.shape[0], SCAN_BLOCK_ROWS):
+        block = arr[start:start + SCAN_BLOCK_ROWS]
+        
+        if block.size == 0:
+            continue
+        
+        if block.dtype.kind != 'f':
+            block = block.astype('float64')
+        
+        n_nonfinite = block.size - np.count_nonzero(np.isfinite(block))
+        if n_nonfinite:
+            block_missing = np.count_nonzero(np.isnan(block))
+            n_missing += block_missing
+            has_infinite = has_infinite or bool(n_nonfinite > block_missing)
+        
+        # fmin skips NaN; -inf counts as negative, as before
+        has_negative = has_negative or np.fmin.reduce(block, axis=None) < 0
+    
+    return int(n_missing), bool(has_negative), has_infinite
+
+
 def validate_parameters(params: Dict) -> Tuple[bool, List[str]]:
     """
     Validate analysis parameters.
@@ -84,12 +254,14 @@ def validate_parameters(params: Dict) -> Tuple[bool, List[str]]:
     sample_name = params.get('sample_name', '')
     if not sample_name:
         errors.append("Sample name is required")
-    elif not sample_name.replace('_', '').isalnum():
-        errors.append("Sample name must be alphanumeric (underscores allowed)")
+    else:
+        name_ok, name_error = validate_sample_name(sample_name)
+        if not name_ok:
+            errors.append(name_error)
     
     # Validate genome
     genome = params.get('genome', '')
-    if genome not in ['hg20', 'mm10']:
+    if genome not in SUPPORTED_GENOMES:
         errors.append(f"Invalid genome: {genome}. Must be 'hg20' or 'mm10'")
     
     # Validate numeric parameters
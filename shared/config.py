@@ -7,15 +7,34 @@ This module provides utilities for loading and managing configuration
 from YAML files and command-line arguments.
 """
 
-import yaml
+import copy
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Tuple, List
 
+from shared.constants import SUPPORTED_GENOMES
+
+
+# Configuration schema checked by validate_config
+REQUIRED_SECTIONS = ('input', 'output', 'copykat')
+REQUIRED_FIELDS = (
+    ('input', 'file'),
+    ('output', 'directory'),
+    ('output', 'sample_name'),
+)
+COPYKAT_RANGES = (
+    ('LOW_DR', 0.0, 0.5),
+    ('UP_DR', 0.0, 0.5),
+)
+
 
 def load_config(config_file: str) -> Dict[str, Any]:
     """
     Load configuration from YAML file.
     
+    Parsed files are memoized on (path, mtime), so repeated loads of an
+    unchanged file skip the YAML parse; edits are picked up on the next call.
+    
     Args:
         config_file: Path to YAML configuration file
     
@@ -26,19 +45,58 @@ def load_config(config_file: str) -> Dict[str, Any]:
         FileNotFoundError: If config file doesn't exist
         yaml.YAMLError: If config file is malformed
     """
-    config_path = Path(config_file)
+    config_path = Path(config_file).resolve()
     
-    if not config_path.exists():
+    try:
+        mtime_ns = config_path.stat().st_mtime_ns
+    except FileNotFoundError:
         raise FileNotFoundError(f"Configuration file not found: {config_file}")
     
+    # Callers may modify the result; keep the cached copy pristine
+    return copy.deepcopy(_load_config_cached(str(config_path), mtime_ns))
+
+
+@lru_cache(maxsize=32)
+def _load_config_cached(config_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    Parse a YAML configuration file (memoized by load_config).
+    
+    Args:
+        config_path: Resolved path to YAML configuration file
+        mtime_ns: File modification time; part of the cache key only
+    
+    Returns:
+        Dictionary with configuration
+    """
+    import yaml  # Deferred: only needed on a cache miss
+    
+    loader, _ = _yaml_safe_classes()
+    
     try:
         with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
-        return config
+            return yaml.load(f, Loader=loader)
     except yaml.YAMLError as e:
         raise ValueError(f"Error parsing YAML configuration: {str(e)}")
 
 
+def _yaml_safe_classes():
+    """
+    Get PyYAML's safe loader and dumper classes.
+    
+    Prefers the libyaml C implementations (several times faster) and
+    falls back to the pure-Python ones when PyYAML was built without libyaml.
+    
+    Returns:
+        Tuple of (SafeLoader, SafeDumper) classes
+    """
+    try:
+        from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+    except ImportError:
+        from yaml import SafeLoader, SafeDumper
+    
+    return SafeLoader, SafeDumper
+
+
 def validate_config(config: Dict[str, Any]) -> Tuple[bool, List[str]]:
     """
     Validate configuration structure and values.
@@ -52,22 +110,14 @@ def validate_config(config: Dict[str, Any]) -> Tuple[bool, List[str]]:
     errors = []
     
     # Check required top-level keys
-    required_keys = ['input', 'output', 'copykat']
-    for key in required_keys:
+    for key in REQUIRED_SECTIONS:
         if key not in config:
             errors.append(f"Missing required section: {key}")
     
-    # Validate input section
-    if 'input' in config:
-        if 'file' not in config['input']:
-            errors.append("Missing required field: input.file")
-    
-    # Validate output section
-    if 'output' in config:
-        if 'directory' not in config['output']:
-            errors.append("Missing required field: output.directory")
-        if 'sample_name' not in config['output']:
-            errors.append("Missing required field: output.sample_name")
+    # Check required fields of the sections that are present
+    for section, field in REQUIRED_FIELDS:
+        if section in config and field not in config[section]:
+            errors.append(f"Missing required field: {section}.{field}")
     
     # Validate copykat section
     if 'copykat' in config:
@@ -75,17 +125,13 @@ def validate_config(config: Dict[str, Any]) -> Tuple[bool, List[str]]:
         
         # Validate genome
         if 'genome' in copykat:
-            if copykat['genome'] not in ['hg20', 'mm10']:
+            if copykat['genome'] not in SUPPORTED_GENOMES:
                 errors.append(f"Invalid genome: {copykat['genome']}")
         
-        # Validate numeric ranges
-        if 'LOW_DR' in copykat:
-            if not (0.0 < copykat['LOW_DR'] <= 0.5):
-                errors.append("LOW_DR must be between 0.0 and 0.5")
-        
-        if 'UP_DR' in copykat:
-            if not (0.0 < copykat['UP_DR'] <= 0.5):
-                errors.append("UP_DR must be between 0.0 and 0.5")
+        # Validate numeric ranges (low < value <= high)
+        for key, low, high in COPYKAT_RANGES:
+            if key in copykat and not (low < copykat[key] <= high):
+                errors.append(f"{key} must be between {low} and {high}")
         
         if 'LOW_DR' in copykat and 'UP_DR' in copykat:
             if copykat['UP_DR'] < copykat['LOW_DR']:
@@ -108,14 +154,17 @@ def merge_configs(base_config: Dict, override_config: Dict) -> Dict:
     Returns:
         Merged configuration
     """
-    merged = base_config.copy()
-    
-    for key, value in override_config.items():
-        if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
-            # Recursively merge nested dicts
-            merged[key] = merge_configs(merged[key], value)
-        else:
-            merged[key] = value
+    # Copy the base tree once, then merge nested dicts in place
+    merged = copy.deepcopy(base_config)
+    stack = [(merged, override_config)]
+    
+    while stack:
+        dst, src = stack.pop()
+        for key, value in src.items():
+            if isinstance(value, dict) and isinstance(dst.get(key), dict):
+                stack.append((dst[key], value))
+            else:
+                dst[key] = value
     
     return merged
 
@@ -128,11 +177,14 @@ def save_config(config: Dict[str, Any], output_file: str) -> None:
         config: Configuration dictionary
         output_file: Path to output YAML file
     """
+    import yaml
+    
+    _, dumper = _yaml_safe_classes()
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
     with open(output_path, 'w') as f:
-        yaml.safe_dump(config, f, default_flow_style=False, sort_keys=False)
+        yaml.dump(config, f, Dumper=dumper, default_flow_style=False, sort_keys=False)
 
 
 def get_default_config() -> Dict[str, Any]:
@@ -33,15 +33,20 @@ MIN_GENES = 1000
 MIN_GENES_RECOMMENDED = 5000
 MAX_MT_PERCENT = 20
 
+# Option sets below come in pairs: a tuple for display order and a
+# frozenset for membership checks
+
 # Genome Options
-SUPPORTED_GENOMES = ["hg20", "mm10"]
+GENOME_OPTIONS = ("hg20", "mm10")
+SUPPORTED_GENOMES = frozenset(GENOME_OPTIONS)
 GENOME_DISPLAY_NAMES = {
     "hg20": "Human (hg20)",
     "mm10": "Mouse (mm10)"
 }
 
 # Distance Metrics
-DISTANCE_METRICS = ["euclidean", "pearson", "spearman"]
+DISTANCE_OPTIONS = ("euclidean", "pearson", "spearman")
+DISTANCE_METRICS = frozenset(DISTANCE_OPTIONS)
 DISTANCE_DISPLAY_NAMES = {
     "euclidean": "Euclidean (standard)",
     "pearson": "Pearson correlation",
@@ -49,7 +54,8 @@ DISTANCE_DISPLAY_NAMES = {
 }
 
 # Cell Type Classifications
-CELL_TYPES = ["aneuploid", "diploid", "not.defined"]
+CELL_TYPE_OPTIONS = ("aneuploid", "diploid", "not.defined")
+CELL_TYPES = frozenset(CELL_TYPE_OPTIONS)
 CELL_TYPE_COLORS = {
     "aneuploid": "#FF6B6B",  # Red
     "diploid": "#4ECDC4",     # Teal
@@ -57,8 +63,11 @@ CELL_TYPE_COLORS = {
 }
 
 # File Extensions
-SUPPORTED_INPUT_FORMATS = [".txt", ".csv", ".tsv", ".gz", ".rds"]
-SUPPORTED_COMPRESSED_FORMATS = [".gz"]
+INPUT_FORMAT_OPTIONS = (".txt", ".csv", ".tsv", ".gz", ".rds")
+SUPPORTED_INPUT_FORMATS = frozenset(INPUT_FORMAT_OPTIONS)
+# Formats the web upload can parse (.rds is only read by the R pipeline)
+UPLOAD_FORMAT_OPTIONS = tuple(ext for ext in INPUT_FORMAT_OPTIONS if ext != ".rds")
+SUPPORTED_COMPRESSED_FORMATS = frozenset({".gz"})
 
 # Output File Patterns
 OUTPUT_FILE_PATTERNS = {
@@ -5,11 +5,23 @@ Common utilities used by both frontend and backend.
 """
 
 import os
+import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Tuple, List, Optional
 from datetime import datetime
 
+from shared.constants import SUPPORTED_GENOMES
 
+
+# Binary size units, one per factor of 1024
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+# Sample name characters: ASCII letters, digits or underscores
+SAMPLE_NAME_RE = re.compile(r'\A[A-Za-z0-9_]+\Z')
+
+
+@lru_cache(maxsize=512)
 def get_absolute_path(relative_path: str) -> str:
     """
     Convert relative path to absolute path from project root.
@@ -34,6 +46,7 @@ def ensure_dir_exists(dir_path: str) -> None:
     Path(dir_path).mkdir(parents=True, exist_ok=True)
 
 
+@lru_cache(maxsize=1)
 def get_project_root() -> str:
     """
     Get project root directory.
@@ -85,18 +98,19 @@ def list_result_directories(results_dir: str = "backend/results") -> List[str]:
     Returns:
         List of result directory paths
     """
-    results_path = Path(get_absolute_path(results_dir))
+    results_path = get_absolute_path(results_dir)
     
-    if not results_path.exists():
+    if not os.path.exists(results_path):
         return []
     
-    # Find directories (not files)
-    dirs = [str(d) for d in results_path.iterdir() if d.is_dir()]
+    # Find directories (not files); DirEntry caches its stat result
+    with os.scandir(results_path) as it:
+        entries = [(e.path, e.stat().st_mtime) for e in it if e.is_dir()]
     
     # Sort by modification time (most recent first)
-    dirs.sort(key=lambda x: Path(x).stat().st_mtime, reverse=True)
+    entries.sort(key=lambda entry: entry[1], reverse=True)
     
-    return dirs
+    return [path for path, _ in entries]
 
 
 def validate_file_path(file_path: str) -> Tuple[bool, str]:
@@ -136,7 +150,7 @@ def validate_genome(genome: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    return genome in ['hg20', 'mm10']
+    return genome in SUPPORTED_GENOMES
 
 
 def validate_sample_name(name: str) -> Tuple[bool, str]:
@@ -152,7 +166,7 @@ def validate_sample_name(name: str) -> Tuple[bool, str]:
     if not name:
         return False, "Sample name cannot be empty"
     
-    if not name.replace('_', '').isalnum():
+    if not SAMPLE_NAME_RE.match(name):
         return False, "Sample name must be alphanumeric (underscores allowed)"
     
     if len(name) > 50:
@@ -161,10 +175,13 @@ def validate_sample_name(name: str) -> Tuple[bool, str]:
     return True, ""
 
 
+@lru_cache(maxsize=256)
 def timestamp_to_readable(timestamp: str) -> str:
     """
     Convert timestamp to human-readable format.
     
+    Memoized, since result lists re-render the same timestamps every rerun.
+    
     Args:
         timestamp: ISO format timestamp string
     
@@ -188,11 +205,9 @@ def bytes_to_human_readable(size_bytes: int) -> str:
     Returns:
         Formatted string (e.g., "1.5 MB")
     """
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.1f} PB"
+    # Unit index straight from the bit length: each unit spans 10 bits
+    idx = min(len(SIZE_UNITS) - 1, max(0, (max(int(size_bytes), 0).bit_length() - 1) // 10))
+    return f"{size_bytes / (1 << (idx * 10)):.1f} {SIZE_UNITS[idx]}"
 
 
 def find_latest_result(sample_name: str, results_dir: str = "backend/results") -> Optional[str]:
@@ -206,40 +221,54 @@ def find_latest_result(sample_name: str, results_dir: str = "backend/results") -
     Returns:
         Path to most recent result directory or None
     """
-    results_path = Path(get_absolute_path(results_dir))
+    results_path = get_absolute_path(results_dir)
     
-    if not results_path.exists():
+    if not os.path.exists(results_path):
         return None
     
-    # Find directories starting with sample name
-    pattern = f"{sample_name}_*"
-    matches = list(results_path.glob(pattern))
+    # Single pass over entries starting with sample name, keeping the most recent
+    prefix = f"{sample_name}_"
+    latest = None
+    latest_mtime = -1.0
     
-    if not matches:
-        return None
+    with os.scandir(results_path) as it:
+        for entry in it:
+            if entry.name.startswith(prefix):
+                mtime = entry.stat().st_mtime
+                if mtime > latest_mtime:
+                    latest_mtime, latest = mtime, entry.path
     
-    # Return most recent
-    latest = max(matches, key=lambda p: p.stat().st_mtime)
-    return str(latest)
+    return latest
 
 
+@lru_cache(maxsize=1024)
 def get_file_extension(file_path: str) -> str:
     """
     Get file extension (including compound extensions like .txt.gz).
     
+    Works on the file name string directly, following pathlib's suffix
+    rules (leading dots belong to the name, a trailing dot is no suffix).
+    
     Args:
         file_path: Path to file
     
     Returns:
         File extension (e.g., ".txt.gz")
     """
-    path = Path(file_path)
+    name = os.path.basename(file_path.rstrip(os.sep))
+    dot = name.rfind('.')
+    
+    if not 0 < dot < len(name) - 1:
+        return ''
     
-    # Handle compound extensions
-    if path.suffix == '.gz' and len(path.suffixes) > 1:
-        return ''.join(path.suffixes[-2:])
+    # Handle compound extensions; the inner dot must come after any leading dots
+    if name.endswith('.gz'):
+        stem = name[:dot]
+        inner = stem.rfind('.')
+        if inner >= len(stem) - len(stem.lstrip('.')):
+            return name[inner:]
     
-    return path.suffix
+    return name[dot:]
 
 
 def cleanup_temp_files(temp_dir: str) -> int:
@@ -0,0 +1,154 @@
+"""
+Shared Test Fixtures
+
+Session-scoped fixtures so expensive setup (module imports, parsing
+sample data) runs once for the whole suite instead of once per test.
+"""
+
+import functools
+import shutil
+import subprocess
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+# Small sample files used across tests
+DATA_DIR = Path(__file__).resolve().parent / "data"
+SAMPLE_PREDICTIONS = DATA_DIR / "sample_predictions.tsv"
+SAMPLE_CNV = DATA_DIR / "sample_cnv.tsv"
+
+
+@pytest.fixture(autouse=True)
+def mock_subprocess(monkeypatch):
+    """
+    Stand-in for the subprocess module used by the R executor.
+    
+    Applied to every test so none can launch Rscript; tests configure
+    mock_subprocess.Popen to simulate an R run.
+    """
+    from backend.api import r_executor
+    
+    fake = mock.MagicMock(name='subprocess')
+    fake.PIPE = subprocess.PIPE
+    fake.STDOUT = subprocess.STDOUT
+    monkeypatch.setattr(r_executor, 'subprocess', fake)
+    
+    yield fake
+
+
+@pytest.fixture(autouse=True)
+def instant_polling(request, monkeypatch):
+    """
+    Make status polling return immediately instead of waiting.
+    
+    wait_for_update normally blocks for up to POLL_INTERVAL_SECONDS; here
+    each call reports a full timeout at once and advances the monitor's
+    clock by that timeout, so the monitor moves one stage per poll and
+    tests assert on the sequence of statuses, not time. Tests marked
+    real_polling keep the real wait.
+    """
+    if request.node.get_closest_marker('real_polling'):
+        yield None
+        return
+    
+    from backend.api import status_monitor
+    
+    clock = [0.0]
+    
+    def _wait(process, watcher=None, timeout=status_monitor.POLL_INTERVAL_SECONDS):
+        clock[0] += timeout
+        return True
+    
+    wait = mock.MagicMock(name='wait_for_update', side_effect=_wait)
+    monkeypatch.setattr(status_monitor, 'wait_for_update', wait)
+    monkeypatch.setattr(status_monitor, 'monotonic', lambda: clock[0])
+    
+    yield wait
+
+
+@pytest.fixture(scope="session", autouse=True)
+def parse_cache_dir(tmp_path_factory):
+    """
+    Keep the parser's Parquet cache in a temporary directory.
+    
+    Stops the suite from writing into the user's ~/.cache.
+    """
+    from backend.api import result_parser
+    
+    cache_dir = tmp_path_factory.mktemp('parse_cache')
+    with mock.patch.object(result_parser, 'PARSE_CACHE_DIR', cache_dir):
+        yield cache_dir
+
+
+@pytest.fixture(scope="session")
+def r_executor():
+    """R executor module, imported once per session."""
+    from backend.api import r_executor as module
+    
+    yield module
+
+
+@pytest.fixture(scope="session")
+def sample_predictions_file():
+    """Path to the sample CopyKAT predictions file."""
+    yield SAMPLE_PREDICTIONS
+
+
+@pytest.fixture(scope="session")
+def sample_predictions_df():
+    """Sample CopyKAT predictions, parsed once per session."""
+    df = pd.read_csv(SAMPLE_PREDICTIONS, sep='\t')
+    
+    yield df
+
+
+@pytest.fixture(scope="session")
+def sample_cnv_file():
+    """Path to the sample CopyKAT CNA results file."""
+    yield SAMPLE_CNV
+
+
+@pytest.fixture(scope="session")
+def sample_cnv_df():
+    """
+    Sample CopyKAT CNA matrix (genomic bins x cells), parsed once per session.
+    
+    Shared by every test that takes it; copy it before modifying.
+    """
+    df = pd.read_csv(SAMPLE_CNV, sep='\t')
+    
+    yield df
+
+
+@functools.lru_cache(maxsize=4)
+def load_predictions(path: str) -> pd.DataFrame:
+    """Parse a predictions file with the backend parser, once per path."""
+    from backend.api.result_parser import parse_predictions
+    
+    return parse_predictions(Path(path))
+
+
+@pytest.fixture(scope="session")
+def parsed_predictions(tmp_path_factory):
+    """
+    Sample predictions parsed by result_parser.parse_predictions.
+    
+    The file is copied to a temporary directory first, so the Parquet
+    sidecar cached by the parser is keyed on a path private to the suite.
+    """
+    path = tmp_path_factory.mktemp('predictions') / SAMPLE_PREDICTIONS.name
+    shutil.copy(SAMPLE_PREDICTIONS, path)
+    
+    yield load_predictions(str(path))
+    
+    load_predictions.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def parsed_summary(parsed_predictions):
+    """Summary statistics of the parsed sample predictions."""
+    from backend.api.result_parser import generate_summary
+    
+    yield generate_summary(parsed_predictions)
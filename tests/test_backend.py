@@ -6,47 +6,338 @@ Unit tests for backend API and R integration.
 Author: Rajan Tavathia & Jimmy Liu
 """
 
-import unittest
+import io
+import os
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
 from pathlib import Path
+from unittest import mock
 
+import pandas as pd
+import pytest
 
-class TestRExecutor(unittest.TestCase):
-    """Test R script execution"""
+
+# R executor
+
+def test_build_r_command(r_executor):
+    """Test R command construction"""
+    params = {
+        'input_file': 'data/sample.txt.gz',
+        'output_dir': 'results',
+        'sample_name': 'sample_001',
+        'genome': 'hg20',
+        'KS_cut': 0.1,
+        'n_cores': 4
+    }
     
-    def test_build_r_command(self):
-        """Test R command construction"""
-        # TODO: Implement test
-        pass
+    command = r_executor.build_r_command('copykat_analysis.R', params)
     
-    def test_run_analysis(self):
-        """Test analysis execution"""
-        # TODO: Implement test
-        pass
+    assert command == [
+        'Rscript', 'copykat_analysis.R',
+        '--input', 'data/sample.txt.gz',
+        '--output', 'results',
+        '--name', 'sample_001',
+        '--genome', 'hg20',
+        '--cores', '4',
+        '--ks_cut', '0.1'
+    ]
 
 
-class TestResultParser(unittest.TestCase):
-    """Test result parsing"""
+def fake_r_process(predictions_file, output_dir, sample_name, return_code=0):
+    """
+    Build a Popen side effect that mimics an R run.
     
-    def test_parse_predictions(self):
-        """Test predictions file parsing"""
-        # TODO: Implement test
-        pass
+    On success predictions_file is copied to where the R script would
+    write its predictions (a timestamped directory under output_dir).
+    """
+    def _popen(command, **kwargs):
+        if return_code == 0:
+            run_dir = Path(output_dir) / f"{sample_name}_20250101_120000"
+            run_dir.mkdir(parents=True)
+            shutil.copy(predictions_file, run_dir / f"{sample_name}_copykat_prediction.txt")
+        
+        process = mock.MagicMock()
+        process.stdout = io.StringIO("Loading data...\nRunning CopyKAT...\n")
+        process.wait.return_value = return_code
+        return process
+    
+    return _popen
+
+
+def test_run_analysis(r_executor, mock_subprocess, sample_predictions_file, tmp_path):
+    """Test analysis execution"""
+    params = {
+        'input_file': str(tmp_path / 'sample.txt'),
+        'output_dir': str(tmp_path / 'results'),
+        'sample_name': 'sample_001',
+        'genome': 'hg20'
+    }
+    mock_subprocess.Popen.side_effect = fake_r_process(
+        sample_predictions_file, params['output_dir'], 'sample_001'
+    )
+    
+    result = r_executor.run_copykat_analysis(params)
+    
+    mock_subprocess.Popen.assert_called_once()
+    command = mock_subprocess.Popen.call_args.args[0]
+    assert command == r_executor.build_r_command("backend/r_scripts/copykat_analysis.R", params)
+    mock_subprocess.run.assert_not_called()
+    
+    assert result['success'], result['error']
+    assert Path(result['output_dir']).name == 'sample_001_20250101_120000'
+    assert set(result['files']) == {'predictions'}
+    assert result['summary']['n_cells'] == 10
+    assert result['summary']['n_aneuploid'] == 6
+
+
+def test_run_analysis_failure(r_executor, mock_subprocess, sample_predictions_file, tmp_path):
+    """Test that a failing R script is reported with its output"""
+    params = {
+        'input_file': str(tmp_path / 'sample.txt'),
+        'output_dir': str(tmp_path / 'results'),
+        'sample_name': 'sample_001',
+        'genome': 'hg20'
+    }
+    mock_subprocess.Popen.side_effect = fake_r_process(
+        sample_predictions_file, params['output_dir'], 'sample_001', return_code=1
+    )
+    
+    result = r_executor.run_copykat_analysis(params)
+    
+    assert not result['success']
+    assert result['error'].startswith('R script failed')
+    assert 'Running CopyKAT...' in result['error']
+
+
+def test_output_reader_drains_without_log(r_executor, tmp_path):
+    """Test that output is still consumed when the log file cannot be opened"""
+    process = mock.MagicMock()
+    process.stdout = io.StringIO("line 1\nline 2\n")
+    
+    thread, tail = r_executor.start_output_reader(process, str(tmp_path / 'missing' / 'r.log'))
+    thread.join(timeout=5)
+    
+    assert not thread.is_alive()
+    assert process.stdout.closed
+    assert tail[0].startswith("Could not open log file")
+    assert list(tail)[1:] == ["line 1\n", "line 2\n"]
+
+
+# Result parser
+
+def test_parse_predictions(parsed_predictions, sample_predictions_df):
+    """Test predictions file parsing"""
+    assert list(parsed_predictions.columns) == ['cell.names', 'copykat.pred', 'copykat.confidence']
+    assert isinstance(parsed_predictions['copykat.pred'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(
+        parsed_predictions, sample_predictions_df, check_dtype=False, check_categorical=False
+    )
+
+
+def test_parse_predictions_cache(parse_cache_dir, sample_predictions_file, tmp_path):
+    """Test that the Parquet cache stays out of the input directory"""
+    from backend.api.result_parser import parse_predictions
+    
+    path = tmp_path / sample_predictions_file.name
+    shutil.copy(sample_predictions_file, path)
+    
+    first = parse_predictions(path)
+    cached = parse_predictions(path)
+    
+    assert sorted(p.name for p in tmp_path.iterdir()) == [path.name]
+    pd.testing.assert_frame_equal(cached, first)
+    
+    # Rewriting the source replaces its sidecar rather than reusing it
+    path.write_text(path.read_text().replace('diploid', 'aneuploid'))
+    reparsed = parse_predictions(path)
+    
+    assert (reparsed['copykat.pred'] == 'aneuploid').sum() == 9
+    assert len(list(parse_cache_dir.glob('*.parquet'))) == len({
+        p.name.split('-')[0] for p in parse_cache_dir.glob('*.parquet')
+    })
+
+
+def test_parse_cache_pruning(monkeypatch, sample_predictions_file, tmp_path):
+    """Test that the Parquet cache drops old and least recently used sidecars"""
+    from backend.api import result_parser
+    
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    monkeypatch.setattr(result_parser, 'PARSE_CACHE_DIR', cache_dir)
+    monkeypatch.setattr(result_parser, 'PARSE_CACHE_MAX_BYTES', 6000)
+    
+    # Sidecars of results that no longer exist: one expired, two by age order
+    now = time.time()
+    for name, size, age_days in [('expired', 10, 60), ('older', 3000, 2), ('newer', 500, 1)]:
+        path = cache_dir / f"{name}-1-1.parquet"
+        path.write_bytes(b'x' * size)
+        os.utime(path, (now - age_days * 86400,) * 2)
+    
+    path = tmp_path / sample_predictions_file.name
+    shutil.copy(sample_predictions_file, path)
+    result_parser.parse_predictions(path)
+    
+    remaining = sorted(p.name.split('-')[0] for p in cache_dir.iterdir())
+    assert remaining == sorted(['newer', result_parser._sidecar_key(path)])
+
+
+def test_parse_copykat_results_sees_new_files(sample_predictions_file, sample_cnv_file, tmp_path):
+    """Test that cached results pick up files written after the first parse"""
+    from backend.api.result_parser import parse_copykat_results
+    
+    shutil.copy(sample_predictions_file, tmp_path / 'glio_001_copykat_prediction.txt')
+    
+    first = parse_copykat_results(str(tmp_path))
+    assert first['cna_segments'] is None
+    first['file_paths']['heatmap'] = 'tampered'
+    
+    shutil.copy(sample_cnv_file, tmp_path / 'glio_001_copykat_CNA_results.txt')
+    (tmp_path / 'glio_001_report.html').write_text("<html></html>")
+    
+    second = parse_copykat_results(str(tmp_path))
+    assert second['cna_segments'] is not None
+    assert set(second['file_paths']) == {'predictions', 'cna_results', 'report'}
+    assert second['summary'] == first['summary']
+
+
+def test_generate_summary(parsed_summary):
+    """Test summary generation"""
+    assert parsed_summary['n_cells'] == 10
+    assert parsed_summary['n_aneuploid'] == 6
+    assert parsed_summary['n_diploid'] == 3
+    assert parsed_summary['n_not_defined'] == 1
+    assert parsed_summary['aneuploid_fraction'] == pytest.approx(0.6)
+    assert parsed_summary['mean_confidence'] == pytest.approx(0.79)
+    assert parsed_summary['class_counts'] == {'aneuploid': 6, 'diploid': 3, 'not.defined': 1}
+
+
+# Status monitor
+
+def test_progress_monitoring(instant_polling):
+    """Test progress monitoring"""
+    from backend.api.status_monitor import monitor_analysis_progress
+    
+    process = mock.MagicMock()
+    process.poll.side_effect = [None, None, None, 0]
+    process.returncode = 0
+    output_lines = ["INFO: STEP 4: Running CopyKAT"]
+    
+    statuses = list(monitor_analysis_progress(process, output_lines=output_lines))
     
-    def test_generate_summary(self):
-        """Test summary generation"""
-        # TODO: Implement test
+    assert [s['progress'] for s in statuses] == [0.1, 0.2, 0.3, 1.0]
+    assert [s['stage'] for s in statuses] == ['Stage 1/6', 'Stage 2/6', 'Stage 3/6', 'Complete']
+    assert all(s['message'] == 'Running CopyKAT' for s in statuses[:-1])
+    assert statuses[-1]['complete'] and statuses[-1]['success']
+    assert all(
+        datetime.fromisoformat(s['timestamp']) == datetime.fromtimestamp(s['timestamp_ns'] / 1e9)
+        for s in statuses
+    )
+    assert instant_polling.call_count == 3
+
+
+class BusyLogWatcher:
+    """Log watcher that reports a write every few milliseconds."""
+    
+    def read(self, timeout=None):
+        time.sleep(min(timeout or 0, 5) / 1000)
+        return ['modified']
+    
+    def close(self):
         pass
 
 
-class TestStatusMonitor(unittest.TestCase):
-    """Test status monitoring"""
+@pytest.mark.real_polling
+@pytest.mark.parametrize("watcher", [None, BusyLogWatcher()], ids=["polling", "log-watch"])
+def test_progress_monitoring_with_busy_log(watcher, monkeypatch, tmp_path):
+    """Test that stages keep advancing while R writes its log continuously"""
+    from backend.api import status_monitor
+    
+    monkeypatch.setattr(status_monitor, 'POLL_INTERVAL_SECONDS', 0.1)
+    monkeypatch.setattr(status_monitor, 'open_log_watch', lambda log_file: watcher)
+    log_file = tmp_path / 'analysis.log'
+    log_file.write_text("")
+    script = (
+        "import time\n"
+        f"with open({str(log_file)!r}, 'a', buffering=1) as log:\n"
+        "    for i in range(60):\n"
+        "        log.write(f'INFO: STEP 1: chunk {i}\\n')\n"
+        "        time.sleep(0.01)\n"
+    )
+    process = subprocess.Popen([sys.executable, '-c', script])
+    
+    try:
+        statuses = list(status_monitor.monitor_analysis_progress(process, log_file=str(log_file)))
+    finally:
+        process.kill()
+        process.wait()
+    
+    stages = [s['stage'] for s in statuses if not s['complete']]
+    assert len(set(stages)) > 1
+    assert stages == sorted(stages)
+    assert statuses[-1]['complete'] and statuses[-1]['success']
+
+
+@pytest.mark.real_polling
+def test_wait_for_update_timeout():
+    """Test that a quiet, still-running process reports a full timeout"""
+    from backend.api.status_monitor import wait_for_update
     
-    def test_progress_monitoring(self):
-        """Test progress monitoring"""
-        # TODO: Implement test
+    process = mock.MagicMock()
+    process.wait.side_effect = subprocess.TimeoutExpired('Rscript', 0.01)
+    
+    assert wait_for_update(process, timeout=0.01) is True
+    process.wait.assert_called_once_with(timeout=0.01)
+
+
+class QuietLogWatcher:
+    """Log watcher whose log never changes."""
+    
+    def read(self, timeout=None):
+        time.sleep(min(timeout or 0, 5) / 1000)
+        return []
+    
+    def close(self):
         pass
 
 
-if __name__ == '__main__':
-    unittest.main()
+@pytest.mark.real_polling
+def test_wait_for_update_wakes_on_exit_with_watcher():
+    """Test that process exit ends a log-watching wait before the timeout"""
+    from backend.api.status_monitor import wait_for_update
+    
+    process = mock.MagicMock()
+    process.poll.side_effect = [None, None, 0]
+    
+    start = time.monotonic()
+    assert wait_for_update(process, QuietLogWatcher(), timeout=30) is False
+    assert time.monotonic() - start < 5
+    assert process.poll.call_count == 3
+
+
+@pytest.mark.real_polling
+def test_wait_for_update_timeout_with_watcher():
+    """Test that a quiet log and a running process report a full timeout"""
+    from backend.api.status_monitor import wait_for_update
+    
+    process = mock.MagicMock()
+    process.poll.return_value = None
+    
+    assert wait_for_update(process, QuietLogWatcher(), timeout=0.02) is True
 
+
+def test_progress_monitoring_failure(instant_polling):
+    """Test that a non-zero exit code ends monitoring with an error status"""
+    from backend.api.status_monitor import monitor_analysis_progress
+    
+    process = mock.MagicMock()
+    process.poll.side_effect = [None, 1]
+    process.returncode = 1
+    
+    statuses = list(monitor_analysis_progress(process))
+    
+    assert len(statuses) == 2
+    assert statuses[-1]['complete'] and not statuses[-1]['success']
+    assert statuses[-1]['error_code'] == 1
@@ -6,42 +6,288 @@ Unit tests for Streamlit frontend components.
 Author: Baovi Nguyen
 """
 
-import unittest
+import io
+import numpy as np
 import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
 
 
-class TestFileUploader(unittest.TestCase):
-    """Test file uploader component"""
+class FakeUpload(io.BytesIO):
+    """In-memory stand-in for Streamlit's UploadedFile."""
     
-    def test_file_validation(self):
-        """Test file validation logic"""
-        # TODO: Implement test
-        pass
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
+
+
+# File uploader
+
+def _matrix_bytes(n_genes: int, n_cells: int, sep: str = '\t', value: str = '1') -> bytes:
+    """Expression matrix file contents (genes x cells) filled with value."""
+    header = sep.join(['gene'] + [f"cell_{j}" for j in range(n_cells)])
+    rows = [sep.join([f"GENE{i}"] + [value] * n_cells) for i in range(n_genes)]
+    return '\n'.join([header] + rows).encode()
+
+
+@pytest.mark.parametrize(
+    "filename,content,expected_errors",
+    [
+        ('matrix.txt', _matrix_bytes(20, 60), []),
+        ('matrix.csv', _matrix_bytes(20, 60, sep=','), []),
+        ('matrix.txt', _matrix_bytes(20, 10), ["Too few cells (10). Minimum: 50 cells"]),
+        ('matrix.txt', _matrix_bytes(20, 60, value='-1'),
+         ["Found negative values. Expression data should be non-negative"]),
+        ('matrix.txt', _matrix_bytes(20, 60, value='inf'), ["Found infinite values"]),
+    ],
+    ids=["valid-tsv", "valid-csv", "too-few-cells", "negative", "infinite"]
+)
+def test_file_validation(filename, content, expected_errors):
+    """Test file validation logic"""
+    from frontend.utils.validators import validate_expression_matrix
+    
+    sep = ',' if filename.endswith('.csv') else '\t'
+    df = pd.read_csv(io.BytesIO(content), sep=sep, index_col=0)
+    
+    is_valid, errors, _ = validate_expression_matrix(df)
+    
+    assert errors == expected_errors
+    assert is_valid == (not expected_errors)
+
+
+def test_file_validation_not_cached_across_edits():
+    """Test that fixing or breaking a single cell is not served from cache"""
+    from frontend.utils.validators import validate_expression_matrix
+    
+    df = pd.DataFrame(np.ones((3000, 200)), columns=[f"cell_{j}" for j in range(200)])
+    assert validate_expression_matrix(df)[1] == []
+    
+    edited = df.copy()
+    edited.iloc[1234, 57] = -1.0
+    
+    assert validate_expression_matrix(edited)[1] == [
+        "Found negative values. Expression data should be non-negative"
+    ]
+
+
+def test_validate_matrix_file_keyed_on_upload(tmp_path):
+    """Test that matrix validation is cached on the upload key, not the values"""
+    from frontend.utils.validators import validate_matrix_file
     
-    def test_preview_data(self):
-        """Test data preview functionality"""
-        # TODO: Implement test
-        pass
+    path = tmp_path / 'matrix.parquet'
+    pd.DataFrame(np.ones((20, 60)), columns=[f"cell_{j}" for j in range(60)]).to_parquet(path)
+    assert validate_matrix_file('digest_a:\t', str(path))[:2] == (True, [])
+    
+    # Same upload key: served from the cache without reading the file again
+    pd.DataFrame(-np.ones((20, 60)), columns=[f"cell_{j}" for j in range(60)]).to_parquet(path)
+    assert validate_matrix_file('digest_a:\t', str(path))[0]
+    assert not validate_matrix_file('digest_b:\t', str(path))[0]
+
+
+def _scan_cases():
+    """Matrices covering each _scan_frame path, as (id, DataFrame)."""
+    ints = np.arange(12, dtype='int64').reshape(4, 3)
+    floats = np.array([[0.5, np.nan, 2.0], [np.inf, 1.0, np.nan], [1.0, 2.0, -np.inf]])
+    tall = np.ones((5000, 2))
+    tall[4500, 1] = np.nan
+    
+    return [
+        ('int', pd.DataFrame(ints)),
+        ('int-negative', pd.DataFrame(ints - 5)),
+        ('nullable-int', pd.DataFrame({'a': pd.array([1, None, 3], dtype='Int64'),
+                                       'b': pd.array([None, None, -2], dtype='Int64')})),
+        ('mixed-float32-int', pd.DataFrame({'a': np.array([1.5, np.nan, 0.0], dtype='float32'),
+                                            'b': np.array([3, 4, 5]),
+                                            'c': np.array([np.inf, 1.0, 2.0], dtype='float32')})),
+        ('sparse', pd.DataFrame({'a': pd.arrays.SparseArray([0.0, 0.0, 3.0, -1.0]),
+                                 'b': pd.arrays.SparseArray([np.nan, 2.0, np.nan, np.nan]),
+                                 'c': np.array([1.0, np.inf, 0.0, 2.0])})),
+        ('nan-inf', pd.DataFrame(floats)),
+        ('block-boundary', pd.DataFrame(tall)),
+        ('object', pd.DataFrame({'a': np.array([1, np.nan, -np.inf], dtype=object)})),
+    ]
 
 
-class TestParameterForm(unittest.TestCase):
-    """Test parameter form component"""
+def _reference_scan(df):
+    """Expected _scan_frame result via a dense float64 copy."""
+    values = np.column_stack([
+        df[col].astype('float64').to_numpy(na_value=np.nan) if df[col].dtype != object
+        else df[col].to_numpy(dtype='float64')
+        for col in df.columns
+    ])
     
-    def test_parameter_validation(self):
-        """Test parameter validation"""
-        # TODO: Implement test
-        pass
+    return int(np.isnan(values).sum()), bool(np.nanmin(values) < 0), bool(np.isinf(values).any())
 
 
-class TestVisualization(unittest.TestCase):
-    """Test visualization component"""
+@pytest.mark.parametrize("df", [pytest.param(df, id=name) for name, df in _scan_cases()])
+def test_scan_frame(df):
+    """Test the dtype-specific value scans against a dense float64 scan"""
+    from frontend.utils.validators import _scan_frame
     
-    def test_display_results(self):
-        """Test results display"""
-        # TODO: Implement test
-        pass
+    assert _scan_frame(df) == _reference_scan(df)
 
 
-if __name__ == '__main__':
-    unittest.main()
+def test_file_validation_value_checks():
+    """Test missing/negative/infinite reporting on a mixed-dtype matrix"""
+    from frontend.utils.validators import validate_expression_matrix
+    
+    df = pd.DataFrame({f"cell_{j}": np.arange(20, dtype='int64') for j in range(60)})
+    df['cell_0'] = pd.array([None] + list(range(19)), dtype='Int64')
+    df['cell_1'] = np.full(20, np.inf, dtype='float32')
+    df['cell_2'] = pd.arrays.SparseArray([0.0] * 19 + [-1.0])
+    
+    is_valid, errors, warnings = validate_expression_matrix(df)
+    
+    assert not is_valid
+    assert errors == [
+        "Found negative values. Expression data should be non-negative",
+        "Found infinite values",
+    ]
+    assert "Found 1 missing values" in warnings
+
+
+def test_preview_data(sample_cnv_df):
+    """Test data preview functionality"""
+    from frontend.components.file_uploader import load_preview
+    
+    matrix = sample_cnv_df.drop(columns=['chrom', 'chrompos']).set_index('abspos')
+    upload = FakeUpload(matrix.to_csv(sep='\t').encode(), 'sample_cnv.tsv')
+    
+    preview = load_preview('sample_cnv', '\t', upload, nrows=5)
+    
+    assert preview.shape == (5, matrix.shape[1])
+    assert list(preview.df.columns) == list(matrix.columns)
+    assert preview.cell_preview == ", ".join(matrix.columns[:5])
+    assert preview.vmin == matrix.iloc[:5].to_numpy().min()
+    assert preview.vmax == matrix.iloc[:5].to_numpy().max()
+    assert upload.tell() == 0
+
+
+def _preview_page(data):
+    """App script previewing an in-memory upload."""
+    import io
+    from frontend.components.file_uploader import preview_data
+    
+    upload = io.BytesIO(data)
+    upload.name = 'matrix.txt'
+    upload.file_id = 'matrix'
+    preview_data(upload)
 
+
+def test_preview_data_skips_missing_values():
+    """Test that missing preview cells do not hide the value range"""
+    data = b"gene\tcell_1\tcell_2\nGAPDH\t1.5\t\nACTB\t3\t7.25\n"
+    
+    at = AppTest.from_function(_preview_page, args=(data,)).run()
+    
+    assert not at.exception
+    assert not at.error
+    assert "Min: 1.50, Max: 7.25" in [m.value for m in at.markdown]
+
+
+def _persist_page(uploads):
+    """App script persisting each (name, bytes) upload in turn."""
+    import io
+    import os
+    import streamlit as st
+    from frontend.components.file_uploader import matrix_shape, persist_matrix
+    
+    paths = []
+    for i, (name, data) in enumerate(uploads):
+        upload = io.BytesIO(data)
+        upload.name = name
+        paths.append(persist_matrix(f"digest_{i}", '\t', upload))
+    
+    st.session_state.paths = paths
+    st.session_state.shape = matrix_shape(paths[-1])
+    st.session_state.exists = [os.path.exists(path) for path in paths]
+
+
+def test_persist_matrix():
+    """Test full-matrix parsing of R-style files and replacement of old copies"""
+    r_style = b"cell_1\tcell_2\nGAPDH\t1\t2\nACTB\t3\t4\nTP53\t5\t6\n"
+    with_header = b"gene\tcell_1\nGAPDH\t1\n"
+    
+    at = AppTest.from_function(
+        _persist_page, args=([('a.txt', with_header), ('b.txt', r_style)],)
+    ).run()
+    
+    assert not at.exception
+    assert at.session_state.shape == (3, 2)
+    assert at.session_state.exists == [False, True]
+    
+    at.session_state.session_tmpdir.cleanup()
+
+
+# Parameter form
+
+VALID_PARAMS = {
+    'sample_name': 'glio_001',
+    'genome': 'hg20',
+    'n_cores': 4,
+    'low_dr': 0.05,
+    'up_dr': 0.1,
+    'win_size': 25
+}
+
+
+@pytest.mark.parametrize(
+    "overrides,expected_errors",
+    [
+        ({}, []),
+        ({'sample_name': ''}, ["Sample name is required"]),
+        ({'sample_name': 'glio-001'}, ["Sample name must be alphanumeric (underscores allowed)"]),
+        ({'sample_name': 'glió_001'}, ["Sample name must be alphanumeric (underscores allowed)"]),
+        ({'sample_name': 'g' * 51}, ["Sample name too long (max 50 characters)"]),
+        ({'genome': 'hg19'}, ["Invalid genome: hg19. Must be 'hg20' or 'mm10'"]),
+        ({'n_cores': 0}, ["n_cores must be between 1 and 64"]),
+        ({'low_dr': 0.6, 'up_dr': 0.6},
+         ["LOW.DR must be between 0.01 and 0.5", "UP.DR must be between 0.01 and 0.5"]),
+        ({'low_dr': 0.2, 'up_dr': 0.1}, ["UP.DR must be >= LOW.DR"]),
+        ({'win_size': 5}, ["Window size must be between 10 and 200"]),
+    ],
+    ids=["valid", "missing-name", "bad-name", "non-ascii-name", "long-name", "bad-genome", "no-cores", "dr-range", "dr-order", "small-window"]
+)
+def test_parameter_validation(overrides, expected_errors):
+    """Test parameter validation"""
+    from frontend.utils.validators import validate_parameters
+    
+    is_valid, errors = validate_parameters({**VALID_PARAMS, **overrides})
+    
+    assert errors == expected_errors
+    assert is_valid == (not expected_errors)
+
+
+# Visualization
+
+def _results_page(results):
+    """App script rendering a results dictionary."""
+    from frontend.components.visualization import display_results
+    
+    display_results(results)
+
+
+def test_display_results(sample_cnv_df, sample_predictions_file, parsed_summary, tmp_path):
+    """Test results display"""
+    from frontend.components.visualization import CNA_POSITION_COLUMNS, _load_binned_cnv
+    
+    cna_path = tmp_path / 'sample_copykat_CNA_results.txt'
+    sample_cnv_df.to_csv(cna_path, sep='\t', index=False)
+    results = {
+        'summary': parsed_summary,
+        'files': {
+            'cna_results': str(cna_path),
+            'predictions': str(sample_predictions_file)
+        }
+    }
+    
+    at = AppTest.from_function(_results_page, args=(results,), default_timeout=30).run()
+    
+    assert not at.exception
+    assert [m.value for m in at.metric] == ['10', '6', '3', '1']
+    assert len(at.dataframe) == 1
+    
+    # The heatmap shows cells as rows and genomic bins as columns
+    binned = _load_binned_cnv(str(cna_path), cna_path.stat().st_mtime)
+    expected = sample_cnv_df.drop(columns=CNA_POSITION_COLUMNS).to_numpy(dtype=np.float32).T
+    np.testing.assert_array_equal(binned, expected)
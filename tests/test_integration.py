@@ -6,27 +6,157 @@ End-to-end integration tests.
 Author: Full Team
 """
 
-import unittest
+import io
+import shutil
+from pathlib import Path
+from unittest import mock
 
+import pandas as pd
+import pytest
 
-class TestEndToEnd(unittest.TestCase):
-    """Test complete analysis workflow"""
+
+# Sample name used by the canned R run
+SAMPLE_NAME = 'glio_001'
+
+
+@pytest.fixture(scope="module")
+def canned_r_output(tmp_path_factory, sample_predictions_file, sample_cnv_file):
+    """
+    Output files of a CopyKAT run, built once per module.
+    
+    Serves as the fake R script's results, so no test runs Rscript.
+    """
+    output = tmp_path_factory.mktemp('canned_r_output')
+    shutil.copy(sample_predictions_file, output / f"{SAMPLE_NAME}_copykat_prediction.txt")
+    shutil.copy(sample_cnv_file, output / f"{SAMPLE_NAME}_copykat_CNA_results.txt")
+    
+    yield output
+
+
+@pytest.fixture
+def fake_r_run(mock_subprocess, canned_r_output):
+    """
+    Make the R executor's Popen copy the canned output into place.
+    
+    Mimics the R script creating a timestamped run directory under the
+    requested output directory.
+    """
+    def _popen(command, **kwargs):
+        output_dir = command[command.index('--output') + 1]
+        shutil.copytree(canned_r_output, Path(output_dir) / f"{SAMPLE_NAME}_20250101_120000")
+        
+        process = mock.MagicMock()
+        process.stdout = io.StringIO("INFO: STEP 4: Running CopyKAT\n")
+        process.wait.return_value = 0
+        return process
     
-    def test_complete_workflow(self):
-        """Test full analysis pipeline"""
-        # TODO: Implement end-to-end test
-        # 1. Upload data
-        # 2. Configure parameters
-        # 3. Run analysis
-        # 4. Verify outputs
-        pass
+    mock_subprocess.Popen.side_effect = _popen
     
-    def test_error_handling(self):
-        """Test error handling throughout pipeline"""
-        # TODO: Implement test
-        pass
+    yield mock_subprocess
 
 
-if __name__ == '__main__':
-    unittest.main()
+def test_complete_workflow(fake_r_run, sample_predictions_df, parsed_summary, tmp_path):
+    """Test full analysis pipeline"""
+    from backend.api.r_executor import run_copykat_analysis
+    from backend.api.result_parser import parse_copykat_results
+    from frontend.utils.validators import validate_file_path, validate_parameters
+    
+    # 1. Upload data
+    input_file = tmp_path / 'matrix.txt'
+    input_file.write_text("gene\tcell_1\nGAPDH\t1\n")
+    assert validate_file_path(str(input_file)) == (True, "")
+    
+    # 2. Configure parameters
+    params = {
+        'sample_name': SAMPLE_NAME,
+        'genome': 'hg20',
+        'n_cores': 4,
+        'low_dr': 0.05,
+        'up_dr': 0.1,
+        'win_size': 25
+    }
+    assert validate_parameters(params) == (True, [])
+    
+    # 3. Run analysis
+    results = run_copykat_analysis({
+        'input_file': str(input_file),
+        'output_dir': str(tmp_path / 'results'),
+        'sample_name': params['sample_name'],
+        'genome': params['genome'],
+        'n_cores': params['n_cores'],
+        'LOW_DR': params['low_dr'],
+        'UP_DR': params['up_dr'],
+        'win_size': params['win_size']
+    })
+    
+    assert results['success'], results['error']
+    fake_r_run.Popen.assert_called_once()
+    
+    # 4. Verify outputs
+    assert set(results['files']) == {'predictions', 'cna_results'}
+    
+    parsed = parse_copykat_results(results['output_dir'])
+    
+    pd.testing.assert_frame_equal(
+        parsed['predictions'], sample_predictions_df, check_dtype=False, check_categorical=False
+    )
+    assert parsed['cna_segments'].shape == (24, 13)
+    assert parsed['summary'] == parsed_summary
+    assert results['summary']['class_counts'] == parsed_summary['class_counts']
 
+
+def _parse_missing_results(tmp_path):
+    from backend.api.result_parser import parse_copykat_results
+    parse_copykat_results(str(tmp_path / 'missing'))
+
+
+def _parse_malformed_predictions(tmp_path):
+    from backend.api.result_parser import parse_predictions
+    path = tmp_path / 'bad_copykat_prediction.txt'
+    path.write_bytes(b'\xff\xfe\x00')
+    parse_predictions(path)
+
+
+def _load_missing_config(tmp_path):
+    from shared.config import load_config
+    load_config(str(tmp_path / 'missing.yaml'))
+
+
+def _load_malformed_config(tmp_path):
+    from shared.config import load_config
+    path = tmp_path / 'bad.yaml'
+    path.write_text("copykat: [unclosed\n")
+    load_config(str(path))
+
+
+@pytest.mark.parametrize(
+    "step,exc",
+    [
+        (_parse_missing_results, ValueError),
+        (_parse_malformed_predictions, ValueError),
+        (_load_missing_config, FileNotFoundError),
+        (_load_malformed_config, ValueError),
+    ],
+    ids=["missing-results", "malformed-predictions", "missing-config", "malformed-config"]
+)
+def test_error_handling(step, exc, tmp_path):
+    """Test error handling throughout pipeline"""
+    with pytest.raises(exc):
+        step(tmp_path)
+
+
+def test_rscript_not_found(mock_subprocess, tmp_path):
+    """Test that a failure to launch R is reported, not raised"""
+    from backend.api.r_executor import run_copykat_analysis
+    
+    mock_subprocess.Popen.side_effect = FileNotFoundError("Rscript")
+    
+    results = run_copykat_analysis({
+        'input_file': str(tmp_path / 'matrix.txt'),
+        'output_dir': str(tmp_path / 'results'),
+        'sample_name': SAMPLE_NAME,
+        'genome': 'hg20'
+    })
+    
+    assert not results['success']
+    assert results['error'] == "Unexpected error: Rscript"